@@ -0,0 +1,101 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+
+_STARTED = time.perf_counter()
+
+# Make the sibling analytics scripts importable however this file is launched
+ANALYTICS_DIR = os.path.dirname(os.path.abspath(__file__))
+if ANALYTICS_DIR not in sys.path:
+    sys.path.insert(0, ANALYTICS_DIR)
+
+# Subcommand -> (module, heavy third-party dependencies it pulls in, help text).
+# Nothing listed here is imported until its subcommand actually runs.
+COMMANDS = {
+    "ask": ("nlp_model", ("pandas",), "interactive stat question loop"),
+    "serve": ("nlp_model", ("pandas",), "long-running HTTP stat query service"),
+    "predict": ("td_predictor", ("pandas", "sklearn"), "2025 QB yards/TD predictions"),
+    "qb-report": ("qb_analysis", ("polars",), "QB weather/elevation report (DuckDB loads only on a report cache miss)"),
+    "enrich": ("player_team_analysis", ("duckdb", "polars"), "enrich historical stats with teams and stadiums"),
+    "bench-fetch": ("duck_fetch", ("duckdb", "polars", "pyarrow"),
+                    "benchmark DuckDB -> Polars fetch paths (extra args go to duck_fetch: --csv, --seasons, --repeat)"),
+}
+
+class ImportTimer:
+    """
+    Imports modules on demand and records how long each one took.
+    """
+
+    def __init__(self):
+        self.timings = []
+
+    def load(self, name: str):
+        if name in sys.modules:
+            return sys.modules[name]
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        self.timings.append((name, time.perf_counter() - start))
+        return module
+
+    def report(self, total_s: float):
+        print("\n[IMPORT TIMES]", file=sys.stderr)
+        print(f"  {'cli startup':<24}{(_CLI_READY - _STARTED) * 1000:>10.1f} ms", file=sys.stderr)
+        for name, seconds in self.timings:
+            print(f"  {name:<24}{seconds * 1000:>10.1f} ms", file=sys.stderr)
+        print(f"  {'total to command start':<24}{total_s * 1000:>10.1f} ms", file=sys.stderr)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="analytics", description="NFL performance analytics tools.")
+    parser.add_argument("--import-times", action="store_true",
+                        help="print a per-module import-time breakdown before running the command")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, _, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text)
+
+    serve = sub.choices["serve"]
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+
+    qb_report = sub.choices["qb-report"]
+    qb_report.add_argument("--no-cache", action="store_true", help="recompute every report instead of using the report cache")
+
+    predict = sub.choices["predict"]
+    predict.add_argument("file_path", nargs="?", help="career passing stats CSV (defaults to td_predictor's sample file)")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench-fetch":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    module_name, deps, _ = COMMANDS[args.command]
+
+    timer = ImportTimer()
+    # Dependencies are timed one at a time so the breakdown separates them from the module itself.
+    # Commands whose data loads lazily (ask, serve) defer pandas until the first question.
+    if args.import_times and args.command not in ("ask", "serve"):
+        for dep in deps:
+            timer.load(dep)
+    module = timer.load(module_name)
+    if args.import_times:
+        timer.report(time.perf_counter() - _STARTED)
+
+    if args.command == "ask":
+        module.main()
+    elif args.command == "serve":
+        module.serve(args.host, args.port)
+    elif args.command == "predict" and args.file_path:
+        module.main(args.file_path)
+    elif args.command == "qb-report":
+        module.main(use_cache=not args.no_cache)
+    elif args.command == "bench-fetch":
+        module.main(extra)
+    else:
+        module.main()
+
+_CLI_READY = time.perf_counter()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import time
+
+import polars as pl
+
+# Rows per Arrow record batch in streaming mode
+STREAM_BATCH_ROWS = 100_000
+
+def _arrow_table(result):
+    # to_arrow_table/to_arrow_reader replace fetch_arrow_table/fetch_record_batch in newer DuckDB releases
+    if hasattr(result, "to_arrow_table"):
+        return result.to_arrow_table()
+    return result.fetch_arrow_table()
+
+def _arrow_reader(result, batch_rows: int):
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader(batch_rows)
+    return result.fetch_record_batch(batch_rows)
+
+def nan_to_null(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Turns NaN in float columns into null, as the pandas path (pl.from_pandas) did.
+
+    DuckDB returns NaN for undefined aggregates such as corr() over a constant
+    column; callers and printed reports expect those as null.
+    """
+    floats = [name for name, dtype in df.schema.items() if dtype.is_float()]
+    if not floats:
+        return df
+    return df.with_columns(pl.col(floats).fill_nan(None))
+
+def fetch_pl(con, query: str, params=None) -> pl.DataFrame:
+    """
+    Runs a query and returns its result as a Polars DataFrame via Arrow.
+
+    Arrow buffers are handed to Polars without a pandas round trip, so numeric
+    columns are not copied twice and strings never become Python objects.
+    """
+    return nan_to_null(pl.from_arrow(_arrow_table(con.execute(query, params))))
+
+def iter_pl_batches(con, query: str, params=None, batch_rows: int = STREAM_BATCH_ROWS):
+    """
+    Streams a query result as Polars DataFrames of at most `batch_rows` rows.
+
+    Only one record batch is materialized at a time, for results too large to hold at once.
+    """
+    reader = _arrow_reader(con.execute(query, params), batch_rows)
+    for batch in reader:
+        yield nan_to_null(pl.from_arrow(batch))
+
+def fetch_pl_via_pandas(con, query: str, params=None) -> pl.DataFrame:
+    """
+    The previous DuckDB -> pandas -> Polars path, kept for benchmarking.
+    """
+    return pl.from_pandas(con.execute(query, params).fetchdf())
+
+def benchmark_fetch(con, query: str, repeat: int = 5, batch_rows: int = STREAM_BATCH_ROWS) -> pl.DataFrame:
+    """
+    Times the pandas path, the Arrow path and Arrow streaming on the same query.
+
+    Returns:
+        pl.DataFrame: Best-of-`repeat` seconds per path with rows fetched and speedup over pandas.
+    """
+    def stream(c, q):
+        rows = 0
+        for frame in iter_pl_batches(c, q, batch_rows=batch_rows):
+            rows += frame.height
+        return rows
+
+    paths = {
+        "pandas": lambda: fetch_pl_via_pandas(con, query).height,
+        "arrow": lambda: fetch_pl(con, query).height,
+        "arrow_stream": lambda: stream(con, query),
+    }
+    rows = []
+    for name, run in paths.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            n = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        rows.append({"path": name, "rows": n, "best_s": best})
+    baseline = rows[0]["best_s"]
+    return pl.DataFrame(rows).with_columns((baseline / pl.col("best_s")).round(2).alias("speedup"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DuckDB result fetch paths on the QB fact table.")
+    parser.add_argument("--csv", help="QB weekly CSV (defaults to qb_analysis.DATA_PATH)")
+    parser.add_argument("--seasons", type=int, default=0,
+                        help="replicate the table this many times to simulate more seasons")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    import qb_analysis
+
+    con = qb_analysis.setup_duckdb_connection(args.csv or qb_analysis.DATA_PATH)
+    query = "SELECT * FROM qb_data"
+    if args.seasons > 1:
+        query = f"SELECT q.* FROM qb_data q, range({args.seasons})"
+    print(f"Benchmarking: {query}")
+    print(benchmark_fetch(con, query, repeat=args.repeat))
+    con.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,73 @@
+import argparse
+import bisect
+import csv
+import heapq
+import json
+import logging
 import os
 import re
-import pandas as pd
-from difflib import get_close_matches
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from difflib import SequenceMatcher, get_close_matches
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+STATS_DIR = os.path.join("data", "official_rankings")
+# Minimum seconds between checks of the stat files' modification times
+RELOAD_CHECK_INTERVAL = 2.0
+
+# Query service defaults
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+ANSWER_CACHE_SIZE = 10_000
+# Answer fields that depend only on the normalized question, not on how it was spelled
+RESOLVED_FIELDS = ("matched_name", "matched_position", "score", "value", "reason")
+CACHEABLE_REASONS = ("ok", "stat not available", "no player match")
+# Upper bounds (ms) of the request latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+
+# Same similarity cutoff get_close_matches was called with
+NAME_MATCH_CUTOFF = 0.6
+# Candidates scored exactly per query, taken from the trigram shortlist
+NAME_SHORTLIST_SIZE = 50
+# Score bonus for candidates in the position the question asked about
+POSITION_PREFERENCE_BONUS = 0.05
+# Optional alias table with columns: alias,player
+ALIASES_FILE = os.path.join(STATS_DIR, "player_aliases.csv")
+
+# Common nicknames, matched exactly after normalization
+PLAYER_ALIASES = {
+    "cmc": "Christian McCaffrey",
+    "arsb": "Amon-Ra St. Brown",
+    "mhj": "Marvin Harrison Jr.",
+    "jsn": "Jaxon Smith-Njigba",
+    "ajb": "A.J. Brown",
+}
+
+# Short first names tried in their long form as well ("Pat Mahomes" -> "Patrick Mahomes")
+FIRST_NAME_ALIASES = {
+    "pat": "patrick",
+    "matt": "matthew",
+    "mike": "michael",
+    "chris": "christopher",
+    "josh": "joshua",
+    "tom": "thomas",
+    "dan": "daniel",
+    "nick": "nicholas",
+    "rob": "robert",
+    "jim": "james",
+    "ben": "benjamin",
+    "alex": "alexander",
+    "sam": "samuel",
+    "zach": "zachary",
+    "tony": "anthony",
+}
 
 # Define stat keywords
 STAT_KEYWORDS = {
@@ -27,6 +93,90 @@ POSITION_KEYWORDS = {
     "DEF": ["def", "defense"]
 }
 
+# Common filler words dropped from the player-name residue
+FILLER_WORDS = ['what', 'is', 'the', 'of', 'for', 'how many', 'does', 'did', 'in', 'with',
+                'who', 'are', 'a', 'an', 'to', 'this', 'that', 'my', 'your']
+
+class ParsedQuestion(NamedTuple):
+    stat: str | None
+    position: str
+    player: str
+    position_given: bool
+
+def _build_token_table():
+    """
+    Maps every lower-cased keyword to (kind, value, priority); priority is the
+    keyword group's order in STAT_KEYWORDS / POSITION_KEYWORDS, which decides
+    between several stats or positions in one question.
+    """
+    table = {}
+    for word in FILLER_WORDS:
+        table[word] = ("filler", None, 0)
+    for priority, (pos, keywords) in enumerate(POSITION_KEYWORDS.items()):
+        for word in keywords:
+            table[word] = ("position", pos, priority)
+    for priority, (stat, keywords) in enumerate(STAT_KEYWORDS.items()):
+        for word in keywords:
+            table[word] = ("stat", stat, priority)
+    return table
+
+QUESTION_TOKENS = _build_token_table()
+# One alternation over every keyword, longest first so "rushing yards" wins over "yards"
+QUESTION_TOKEN_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(w) for w in sorted(QUESTION_TOKENS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+NON_NAME_RE = re.compile(r'[^a-zA-Z\s-]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+@lru_cache(maxsize=4096)
+def parse_question(question: str) -> ParsedQuestion:
+    """
+    Extracts stat, position and player name from a question in a single regex pass.
+
+    Every stat, position and filler keyword is matched by one compiled
+    alternation; matches are classified and removed, and what is left is the
+    player name.
+
+    Args:
+        question (str): The user's input question.
+
+    Returns:
+        ParsedQuestion: stat (or None), position (defaults to 'QB'),
+        title-cased player name and whether a position keyword was present.
+    """
+    found = {"stat": None, "position": None}
+
+    def consume(match):
+        kind, value, priority = QUESTION_TOKENS[match.group(0).lower()]
+        if kind != "filler" and (found[kind] is None or priority < found[kind][1]):
+            found[kind] = (value, priority)
+        return ""
+
+    residue = QUESTION_TOKEN_RE.sub(consume, question)
+    residue = WHITESPACE_RE.sub(" ", NON_NAME_RE.sub("", residue)).strip()
+    return ParsedQuestion(
+        stat=found["stat"][0] if found["stat"] else None,
+        position=found["position"][0] if found["position"] else "QB",
+        player=residue.title(),
+        position_given=found["position"] is not None,
+    )
+
+def parse_questions(questions) -> list:
+    """
+    Batch entry point for offline evaluation and load tests.
+
+    Args:
+        questions (Iterable[str]): Questions to parse.
+
+    Returns:
+        list[ParsedQuestion]: One parse per question, in input order; repeated
+        questions are parsed once.
+    """
+    questions = list(questions)
+    parsed = {q: parse_question(q) for q in dict.fromkeys(questions)}
+    return [parsed[q] for q in questions]
+
 def extract_stat_type(question: str):
     """
     Extracts the statistic type from the user's question based on predefined keywords.
@@ -37,10 +187,7 @@ def extract_stat_type(question: str):
     Returns:
         str or None: The matching stat type, or None if not found.
     """
-    for stat, keywords in STAT_KEYWORDS.items():
-        if any(keyword in question.lower() for keyword in keywords):
-            return stat
-    return None
+    return parse_question(question).stat
 
 def extract_position(question: str):
     """
@@ -52,14 +199,7 @@ def extract_position(question: str):
     Returns:
         str: The inferred player position, defaults to 'QB' if not found.
     """
-    question_lower = question.lower()
-    for pos, keywords in POSITION_KEYWORDS.items():
-        for keyword in keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, question_lower):
-                print(f"[DEBUG] Matched position keyword: '{keyword}' for position {pos}")
-                return pos
-    return "QB"
+    return parse_question(question).position
 
 def extract_player_name(question: str):
     """
@@ -72,40 +212,25 @@ def extract_player_name(question: str):
     Returns:
         str: The extracted and formatted player name.
     """
-    question_cleaned = question
-
-    # Remove stat and position keywords
-    for kw_list in list(STAT_KEYWORDS.values()) + list(POSITION_KEYWORDS.values()):
-        for word in kw_list:
-            pattern = r'\b' + re.escape(word) + r'\b'
-            question_cleaned = re.sub(pattern, '', question_cleaned, flags=re.IGNORECASE)
-
-    # Remove common filler words
-    filler_words = ['what', 'is', 'the', 'of', 'for', 'how many', 'does', 'did', 'in', 'with',
-                    'who', 'are', 'a', 'an', 'to', 'this', 'that', 'my', 'your']
-    for filler in filler_words:
-        pattern = r'\b' + re.escape(filler) + r'\b'
-        question_cleaned = re.sub(pattern, '', question_cleaned, flags=re.IGNORECASE)
-
-    # Remove non-alphabetic characters except hyphens and spaces
-    question_cleaned = re.sub(r'[^a-zA-Z\s-]', '', question_cleaned)
-
-    # Collapse spaces and title-case
-    question_cleaned = re.sub(r'\s+', ' ', question_cleaned).strip()
+    return parse_question(question).player
 
-    return question_cleaned.title()
+def stats_file_path(position: str, stats_dir: str = STATS_DIR) -> str:
+    return os.path.join(stats_dir, f"official_{position.lower()}_stats.csv")
 
-def load_stats_dataframe(position: str):
+def load_stats_dataframe(position: str, stats_dir: str = STATS_DIR):
     """
     Loads the CSV file containing stats for the given position.
 
     Args:
         position (str): The position key (e.g., 'QB', 'WR').
+        stats_dir (str): Directory holding the official_{pos}_stats.csv files.
 
     Returns:
         pd.DataFrame or None: The loaded DataFrame or None if file not found or empty.
     """
-    file_path = os.path.join("data", "official_rankings", f"official_{position.lower()}_stats.csv")
+    import pandas as pd
+
+    file_path = stats_file_path(position, stats_dir)
     if not os.path.exists(file_path):
         print(f"[DEBUG] File not found: {file_path}")
         return None
@@ -113,9 +238,275 @@ def load_stats_dataframe(position: str):
     if df.empty:
         print(f"[DEBUG] DataFrame is empty for file: {file_path}")
         return None
-    print(f'{df.head()}')  # Debug: Show the first few rows of the DataFrame
     return df
 
+class StatTable:
+    """
+    One position's stats held in memory.
+
+    Keeps a Player -> row hash map (first row wins, as with the old
+    `row.iloc[0]` lookup) and one array per stat column.
+    """
+
+    def __init__(self, position: str, df: "pd.DataFrame", mtime: int):
+        self.position = position
+        self.mtime = mtime
+        self.row_of = {}
+        for i, name in enumerate(df["Player"].astype(str).tolist()):
+            self.row_of.setdefault(name, i)
+        self.players = list(self.row_of)
+        self.row_of_key = {}
+        for name, i in self.row_of.items():
+            self.row_of_key.setdefault(normalize_name(name), i)
+        self.columns = {col: df[col].to_numpy() for col in df.columns}
+
+    def row(self, player: str):
+        """
+        Returns the row of a player by exact name, else by normalized name, else None.
+        """
+        row = self.row_of.get(player)
+        if row is None:
+            row = self.row_of_key.get(normalize_name(player))
+        return row
+
+    def value(self, player: str, stat: str):
+        """
+        Returns the stat value for a player, or None if the player or stat is unknown.
+        """
+        column = self.columns.get(stat)
+        row = self.row(player)
+        if column is None or row is None:
+            return None
+        return column[row]
+
+def normalize_name(name: str) -> str:
+    """
+    Lower-cases a player name and strips punctuation so "A.J. Brown" and "aj brown" compare equal.
+    """
+    name = re.sub(r"[^a-z0-9\s-]", "", str(name).lower())
+    return re.sub(r"\s+", " ", name).strip()
+
+def load_aliases(path: str = ALIASES_FILE) -> dict:
+    """
+    Returns PLAYER_ALIASES extended with the optional alias CSV, keyed by normalized alias.
+    """
+    aliases = {normalize_name(alias): player for alias, player in PLAYER_ALIASES.items()}
+    if os.path.exists(path):
+        with open(path, newline="") as fh:
+            for row in csv.DictReader(fh):
+                if row.get("alias") and row.get("player"):
+                    aliases[normalize_name(row["alias"])] = row["player"]
+    return aliases
+
+class NameMatcher:
+    """
+    Fuzzy player-name index over every position.
+
+    Names are split into character trigrams held in inverted lists; a query only
+    scores the `shortlist` names sharing the most trigrams with it, using the
+    same SequenceMatcher ratio (and cutoff) as difflib.get_close_matches, so the
+    work per query depends on the shortlist size rather than the player count.
+
+    Names that normalize to the same key share one entry, but the raw spelling
+    is kept per position ("A.J. Brown" in one file, "AJ Brown" in another) so
+    each position's table can be read with the name it actually stores.
+    """
+
+    def __init__(self, names_by_position: dict, aliases: dict | None = None, shortlist: int = NAME_SHORTLIST_SIZE):
+        self.shortlist = shortlist
+        self.aliases = aliases or {}
+        self.names = []
+        self.keys = []
+        self.positions = []
+        self.id_of_key = {}
+        self.postings = defaultdict(list)
+        for position, names in names_by_position.items():
+            for name in names:
+                key = normalize_name(name)
+                name_id = self.id_of_key.get(key)
+                if name_id is None:
+                    name_id = len(self.names)
+                    self.id_of_key[key] = name_id
+                    self.names.append(name)
+                    self.keys.append(key)
+                    self.positions.append({})
+                    for gram in self.trigrams(key):
+                        self.postings[gram].append(name_id)
+                self.positions[name_id].setdefault(position, name)
+
+    @staticmethod
+    def trigrams(key: str) -> set:
+        padded = f"  {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def query_variants(self, key: str) -> list:
+        variants = [key]
+        first, _, rest = key.partition(" ")
+        if first in FIRST_NAME_ALIASES and rest:
+            variants.append(f"{FIRST_NAME_ALIASES[first]} {rest}")
+        return variants
+
+    def candidates(self, query: str, k: int = 5, cutoff: float = NAME_MATCH_CUTOFF) -> list:
+        """
+        Returns up to k (name, positions, score) tuples with score >= cutoff, best first.
+
+        `positions` maps each position the player appears in to the raw name stored there.
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        scores = {}
+        alias = self.aliases.get(key)
+        if alias is not None and normalize_name(alias) in self.id_of_key:
+            scores[self.id_of_key[normalize_name(alias)]] = 1.0
+
+        matcher = SequenceMatcher()
+        for variant in self.query_variants(key):
+            shared = Counter()
+            for gram in self.trigrams(variant):
+                shared.update(self.postings.get(gram, ()))
+            matcher.set_seq2(variant)
+            for name_id, _ in heapq.nlargest(self.shortlist, shared.items(), key=lambda kv: kv[1]):
+                matcher.set_seq1(self.keys[name_id])
+                if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                    continue
+                score = matcher.ratio()
+                if score >= cutoff and score > scores.get(name_id, 0.0):
+                    scores[name_id] = score
+
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(self.names[name_id], dict(self.positions[name_id]), score) for name_id, score in best]
+
+class StatIndex:
+    """
+    Process-wide in-memory index of every position's stat file.
+
+    Files are loaded once and reloaded only when their modification time
+    changes; mtimes are re-checked at most every `check_interval` seconds,
+    so answering a question normally touches no files at all.
+    """
+
+    def __init__(self, stats_dir: str = STATS_DIR, positions=None, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.stats_dir = stats_dir
+        self.positions = list(positions or POSITION_KEYWORDS)
+        self.check_interval = check_interval
+        self.tables = {}
+        self.matcher = NameMatcher({})
+        self.lock = threading.Lock()
+        self._last_check = None
+
+    def refresh(self, force: bool = False):
+        """
+        Reloads any stat file that appeared, disappeared or changed since the last check.
+        """
+        now = time.monotonic()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return
+        with self.lock:
+            self._last_check = now
+            before = {position: table.mtime for position, table in self.tables.items()}
+            for position in self.positions:
+                try:
+                    mtime = os.stat(stats_file_path(position, self.stats_dir)).st_mtime_ns
+                except FileNotFoundError:
+                    self.tables.pop(position, None)
+                    continue
+                table = self.tables.get(position)
+                if table is not None and table.mtime == mtime:
+                    continue
+                df = load_stats_dataframe(position, self.stats_dir)
+                if df is None or "Player" not in df.columns:
+                    self.tables.pop(position, None)
+                    continue
+                self.tables[position] = StatTable(position, df, mtime)
+                logging.debug(f"Indexed {len(df)} {position} rows")
+            after = {position: table.mtime for position, table in self.tables.items()}
+            if after != before:
+                self.matcher = NameMatcher(
+                    {position: table.players for position, table in self.tables.items()}, load_aliases()
+                )
+
+    def table(self, position: str):
+        """
+        Returns the StatTable for a position, or None if its file is missing or empty.
+        """
+        self.refresh()
+        return self.snapshot().tables.get(position)
+
+    def snapshot(self) -> "IndexSnapshot":
+        """
+        Returns a consistent view of the loaded tables and name matcher.
+
+        refresh() swaps tables and the matcher under the lock; taking the view
+        under the same lock lets one request read a single data version even if
+        another thread reloads a file meanwhile.
+        """
+        with self.lock:
+            return IndexSnapshot(dict(self.tables), self.matcher)
+
+    @property
+    def version(self) -> tuple:
+        """
+        Identifies the loaded data: the (position, mtime) of every indexed file.
+        """
+        return self.snapshot().version
+
+    def match_players(self, player_name: str, position: str | None = None, k: int = 5,
+                      cutoff: float = NAME_MATCH_CUTOFF) -> list:
+        """
+        Fuzzy-matches a name against every position's players (see IndexSnapshot.match_players).
+        """
+        self.refresh()
+        return self.snapshot().match_players(player_name, position, k=k, cutoff=cutoff)
+
+    def value(self, position: str, player: str, stat: str):
+        return self.snapshot().value(position, player, stat)
+
+class IndexSnapshot(NamedTuple):
+    """
+    Immutable view of a StatIndex at one data version.
+    """
+
+    tables: dict
+    matcher: NameMatcher
+
+    @property
+    def version(self) -> tuple:
+        return tuple(sorted((position, table.mtime) for position, table in self.tables.items()))
+
+    def match_players(self, player_name: str, position: str | None = None, k: int = 5,
+                      cutoff: float = NAME_MATCH_CUTOFF) -> list:
+        """
+        Returns up to k (name, position, score) tuples, best first, with the name
+        spelled as that position's file stores it; candidates in `position` get a
+        small preference so ties resolve to the asked position.
+        """
+        ranked = []
+        for _, positions, score in self.matcher.candidates(player_name, k=k, cutoff=cutoff):
+            for pos, name in positions.items():
+                bonus = POSITION_PREFERENCE_BONUS if pos == position else 0.0
+                ranked.append((score + bonus, name, pos, score))
+        ranked.sort(key=lambda r: -r[0])
+        return [(name, pos, score) for _, name, pos, score in ranked[:k]]
+
+    def value(self, position: str, player: str, stat: str):
+        table = self.tables.get(position)
+        return table.value(player, stat) if table is not None else None
+
+_stat_index = None
+_stat_index_lock = threading.Lock()
+
+def get_stat_index() -> StatIndex:
+    """
+    Returns the process-wide StatIndex, creating it on first use.
+    """
+    global _stat_index
+    with _stat_index_lock:
+        if _stat_index is None:
+            _stat_index = StatIndex()
+    return _stat_index
+
 def find_player_row(df, player_name):
     """
     Uses fuzzy matching to find the player's row in the DataFrame.
@@ -136,6 +527,105 @@ def find_player_row(df, player_name):
     matched_name = matches[0]
     return df[df["Player"] == matched_name]
 
+INCOMPLETE_QUESTION_TEXT = "Please ask a more complete question, like: 'What are the passing yards of Patrick Mahomes?'"
+
+def answer_text(reason: str, player, stat, position, value=None) -> str:
+    """
+    Renders the answer sentence for a result reason, in the asker's own spelling.
+    """
+    if reason == "incomplete question":
+        return INCOMPLETE_QUESTION_TEXT
+    if reason == "no stats loaded":
+        return f"Could not load stats for position {position}."
+    if reason == "no player match":
+        return f"Could not find {stat} stats for {player}."
+    if reason == "stat not available":
+        return f"Stat '{stat}' not available for {player}."
+    return f"{player} had {value} {stat}."
+
+def answer_questions(questions, snapshot: IndexSnapshot | None = None) -> list:
+    """
+    Answers many questions at once.
+
+    Questions are parsed in one batch, each distinct (player, position) is
+    resolved against the name index once, and stat values are read with one
+    vectorized row lookup per (position, stat) group.
+
+    Args:
+        questions (Iterable[str]): The input questions.
+        snapshot (IndexSnapshot): Data to answer from; defaults to a fresh
+            snapshot of the process-wide StatIndex.
+
+    Returns:
+        list[dict]: One result per question, in input order, with keys question,
+        player, stat, position, matched_name, matched_position, score, value,
+        reason ('ok', 'incomplete question', 'no stats loaded', 'no player match'
+        or 'stat not available') and text (the rendered answer).
+    """
+    import pandas as pd
+
+    questions = list(questions)
+    parsed = parse_questions(questions)
+    if snapshot is None:
+        index = get_stat_index()
+        index.refresh()
+        snapshot = index.snapshot()
+
+    # Only a position named in the question earns the preference bonus, not the 'QB' default
+    preferred = [p.position if p.position_given else None for p in parsed]
+    lookups = {(p.player, pos) for p, pos in zip(parsed, preferred) if p.player and p.stat}
+    resolved = {}
+    for player, position in lookups:
+        matches = snapshot.match_players(player, position, k=1)
+        resolved[(player, position)] = matches[0] if matches else None
+
+    results = []
+    groups = defaultdict(list)
+    for i, (question, p) in enumerate(zip(questions, parsed)):
+        result = {
+            "question": question,
+            "player": p.player,
+            "stat": p.stat,
+            "position": p.position,
+            "matched_name": None,
+            "matched_position": None,
+            "score": None,
+            "value": None,
+            "reason": None,
+            "text": None,
+        }
+        results.append(result)
+        if not (p.player and p.stat):
+            result["reason"] = "incomplete question"
+            result["text"] = answer_text(result["reason"], p.player, p.stat, p.position)
+            continue
+        match = resolved[(p.player, preferred[i])]
+        if match is None:
+            result["reason"] = "no stats loaded" if not snapshot.tables else "no player match"
+            result["text"] = answer_text(result["reason"], p.player, p.stat, p.position)
+            continue
+        result["matched_name"], result["matched_position"], result["score"] = match
+        groups[(result["matched_position"], p.stat)].append(i)
+
+    for (position, stat), members in groups.items():
+        table = snapshot.tables.get(position)
+        column = table.columns.get(stat) if table is not None else None
+        rows = [table.row(results[i]["matched_name"]) if table is not None else None for i in members]
+        values = [None] * len(members)
+        if column is not None:
+            found = [j for j, row in enumerate(rows) if row is not None]
+            for j, value in zip(found, column[[rows[j] for j in found]]):
+                values[j] = value
+        for i, value in zip(members, values):
+            result = results[i]
+            if value is None or pd.isna(value):
+                result["reason"] = "stat not available"
+            else:
+                result["reason"] = "ok"
+                result["value"] = value.item() if hasattr(value, "item") else value
+            result["text"] = answer_text(result["reason"], result["player"], stat, result["position"], value)
+    return results
+
 def answer_question(question: str):
     """
     Processes a user question and returns an appropriate stat answer.
@@ -146,43 +636,272 @@ def answer_question(question: str):
     Returns:
         str: The response containing the stat result or error message.
     """
-    stat_type = extract_stat_type(question)
-    position = extract_position(question)
-    player_name = extract_player_name(question)
+    result = answer_questions([question])[0]
+    print(f"\n[DEBUG] Player: '{result['player']}' | Stat: '{result['stat']}' | Position: {result['position']}")
+    if result["matched_name"] is not None:
+        print(f"[DEBUG] Matched '{result['matched_name']}' ({result['matched_position']}, score {result['score']:.2f})")
+    return result["text"]
 
-    print(f"\n[DEBUG] Player: '{player_name}' | Stat: '{stat_type}' | Position: {position}")
+class AnswerCache:
+    """
+    LRU cache of resolved answers keyed on normalized (player, stat, position).
 
-    if not (player_name and stat_type):
-        return "Please ask a more complete question, like: 'What are the passing yards of Patrick Mahomes?'"
+    Only the resolution (matched name/position, score, value, reason) is stored;
+    response text is rendered per request so callers see their own spelling.
 
-    df = load_stats_dataframe(position)
-    if df is None:
-        return f"Could not load stats for position {position}."
+    The whole cache is dropped whenever the stat index's data version changes,
+    so answers never outlive the files they were computed from.
+    """
+
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, version):
+        with self.lock:
+            if version != self.version:
+                if self.entries:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.version = version
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, version, result):
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+class LatencyHistogram:
+    """
+    Fixed-bucket request latency histogram (milliseconds).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total_ms = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, ms: float):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+            self.total_ms += ms
+
+    def quantile(self, q: float):
+        """
+        Returns the upper bound of the bucket holding the q-quantile (None for the open bucket).
+        """
+        total = sum(self.counts)
+        if not total:
+            return None
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= q * total:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
 
-    row = find_player_row(df, player_name)
-    if row is None or row.empty:
-        return f"Could not find {stat_type} stats for {player_name}."
+    def stats(self) -> dict:
+        with self.lock:
+            total = sum(self.counts)
+            buckets = {f"le_{bound}": count for bound, count in zip(self.buckets, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            mean = self.total_ms / total if total else 0.0
+        return {
+            "count": total,
+            "mean_ms": mean,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+class QueryService:
+    """
+    Long-running question answering with warm stat tables, name index and answer cache.
+    """
+
+    def __init__(self, index: StatIndex | None = None, cache_size: int = ANSWER_CACHE_SIZE):
+        self.index = index or get_stat_index()
+        self.cache = AnswerCache(cache_size)
+        self.latency = LatencyHistogram()
+        self.started = time.time()
+        self.index.refresh(force=True)
+
+    def answer(self, questions) -> list:
+        """
+        Answers questions through the cache; misses are answered together in one batch.
+
+        The whole request is answered from one index snapshot, so a concurrent
+        reload cannot mix data versions or invalidate the cache mid-request.
+        """
+        started = time.perf_counter()
+        self.index.refresh()
+        snapshot = self.index.snapshot()
+        version = snapshot.version
+        results = [None] * len(questions)
+        keys = []
+        misses = []
+        for i, question in enumerate(questions):
+            p = parse_question(question)
+            key = (normalize_name(p.player), p.stat, p.position, p.position_given)
+            keys.append(key)
+            cached = self.cache.get(key, version) if p.player and p.stat else None
+            if cached is not None:
+                results[i] = {
+                    "question": question,
+                    "player": p.player,
+                    "stat": p.stat,
+                    "position": p.position,
+                    **cached,
+                    "text": answer_text(cached["reason"], p.player, p.stat, p.position, cached["value"]),
+                    "cached": True,
+                }
+            else:
+                misses.append(i)
+        if misses:
+            answered = answer_questions([questions[i] for i in misses], snapshot)
+            for i, result in zip(misses, answered):
+                if result["reason"] in CACHEABLE_REASONS:
+                    self.cache.put(keys[i], version, {field: result[field] for field in RESOLVED_FIELDS})
+                results[i] = {**result, "cached": False}
+        self.latency.observe((time.perf_counter() - started) * 1000)
+        return results
+
+    def metrics(self) -> dict:
+        return {
+            "uptime_s": time.time() - self.started,
+            "data_version": [list(v) for v in self.index.version],
+            "answer_cache": self.cache.stats(),
+            "parse_cache": parse_question.cache_info()._asdict(),
+            "latency": self.latency.stats(),
+        }
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints: GET /ask?q=..., POST /ask {"question": ...} or {"questions": [...]},
+    GET /metrics and GET /health.
+    """
 
-    value = row.iloc[0].get(stat_type)
-    if pd.isna(value):
-        return f"Stat '{stat_type}' not available for {player_name}."
-    
-    return f"{player_name} had {value} {stat_type}."
+    service: QueryService = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send_json({"status": "ok"})
+        elif url.path == "/metrics":
+            self._send_json(self.service.metrics())
+        elif url.path == "/ask":
+            questions = parse_qs(url.query).get("q", [])
+            if not questions:
+                self._send_json({"error": "missing q parameter"}, 400)
+                return
+            self._send_json(self.service.answer(questions)[0])
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/ask":
+            self._send_json({"error": "not found"}, 404)
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            self._send_json({"error": "invalid JSON"}, 400)
+            return
+        if not isinstance(payload, dict):
+            self._send_json({"error": "expected a JSON object"}, 400)
+            return
+        questions = payload.get("questions")
+        question = payload.get("question")
+        if isinstance(questions, list) and questions and all(isinstance(q, str) for q in questions):
+            self._send_json(self.service.answer(questions))
+        elif "questions" not in payload and isinstance(question, str) and question:
+            self._send_json(self.service.answer([question])[0])
+        else:
+            self._send_json({"error": "expected 'question' (string) or 'questions' (non-empty list of strings)"}, 400)
+
+def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, cache_size: int = ANSWER_CACHE_SIZE):
+    """
+    Runs the query service until interrupted.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+        cache_size (int): Maximum number of cached answers.
+    """
+    handler = type("BoundQueryRequestHandler", (QueryRequestHandler,), {"service": QueryService(cache_size=cache_size)})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving stat questions on http://{host}:{server.server_port} (GET /ask?q=..., /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 def main():
     """
     Main loop for the CLI tool. Accepts user input and returns stat answers.
     """
-    i = 0
-    while i > 1:
-        question = input("Ask about a player (or type 'q'): ").strip()
+    while True:
+        try:
+            question = input("Ask about a player (or type 'q'): ").strip()
+        except EOFError:
+            break
+        if not question:
+            continue
         if question.lower() == 'q':
             print("Goodbye!")
             break
         response = answer_question(question)
         print(response)
-        i += 1
     print("Exiting the program.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Natural-language stat lookup.")
+    parser.add_argument("--serve", action="store_true", help="run the long-lived HTTP query service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.host, args.port)
+    else:
+        main()
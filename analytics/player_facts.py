@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+import polars as pl
+
+from duck_fetch import fetch_pl
+
+HISTORICAL_DIR = "backend/static/data/official_rankings/historical"
+# Weekly ranking CSVs per position; positions whose file is missing are skipped at ingest
+POSITION_DATA_PATHS = {
+    pos.upper(): os.path.join(HISTORICAL_DIR, f"{pos}_week_rankings_2020_2025.csv")
+    for pos in ("qb", "rb", "wr", "te")
+}
+# Persistent DuckDB file holding the shared all-positions fact table
+FACTS_DB_PATH = "backend/static/data/cache/player_facts.duckdb"
+
+# Default weather condition thresholds (used for the precomputed flag columns)
+RAIN_MM_LIGHT = 0.5
+WIND_KPH_WINDY = 25.0
+COLD_C = 5.0
+FREEZING_C = 0.0
+
+MIN_GAMES = 3
+
+# Stat and weather columns cast to DOUBLE; ones a position's file lacks are NULL
+NUMERIC_COLUMNS = [
+    "CMP", "Pass_Att", "Pass_Yds", "Pass_TD", "INT",
+    "Rush_Att", "Rush_Yds", "Rush_TD", "Rec", "Rec_Yds", "Rec_TD",
+    "FPTS",
+    "elevation", "temp_C", "precip_mm", "wind_kph", "rel_humidity", "pressure_hpa",
+]
+
+PARAM_RE = re.compile(r"\$(\w+)")
+
+class WeatherThresholds(NamedTuple):
+    rain_mm: float = RAIN_MM_LIGHT
+    wind_kph: float = WIND_KPH_WINDY
+    cold_c: float = COLD_C
+    freezing_c: float = FREEZING_C
+
+def available_sources(paths: dict | None = None) -> dict:
+    """
+    Returns {position: csv_path} for the position files that exist.
+    """
+    paths = POSITION_DATA_PATHS if paths is None else paths
+    return {pos.upper(): path for pos, path in paths.items() if Path(path).exists()}
+
+def source_fingerprint(sources: dict) -> str:
+    """
+    Identifies one version of every source CSV plus the thresholds baked into the flag columns.
+    """
+    files = []
+    for pos, path in sorted(sources.items()):
+        stat = Path(path).stat()
+        files.append([pos, str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns])
+    return json.dumps({"files": files, "thresholds": list(WeatherThresholds())})
+
+def _sql_str(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def ingest_player_data(con, sources: dict, force: bool = False) -> bool:
+    """
+    Materializes every position's CSV into one typed `player_facts` table sorted by year and position.
+
+    Sorting on (year, position) keeps each season/position in contiguous row
+    groups, so scoped queries skip the rest through DuckDB's zone maps. The CSVs
+    are parsed only when a file's size or mtime (or a default threshold) changes.
+
+    Returns:
+        bool: True if the table was rebuilt, False if the stored copy was current.
+    """
+    fingerprint = source_fingerprint(sources)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS fact_ingest_meta (
+            fingerprint VARCHAR, years INTEGER[], positions VARCHAR[],
+            row_count BIGINT, ingested_at TIMESTAMP
+        )
+    """)
+    stored = con.execute("SELECT fingerprint FROM fact_ingest_meta").fetchone()
+    has_table = con.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_name = 'player_facts'"
+    ).fetchone()[0]
+    if not force and has_table and stored and stored[0] == fingerprint:
+        return False
+
+    files = "[" + ", ".join(_sql_str(path) for path in sources.values()) + "]"
+    source = f"read_csv_auto({files}, header=True, ignore_errors=True, union_by_name=True, filename=True)"
+    present = {row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+    numeric = ",\n                ".join(
+        f'CAST("{col}" AS DOUBLE) AS {col}' if col in present else f"CAST(NULL AS DOUBLE) AS {col}"
+        for col in NUMERIC_COLUMNS
+    )
+    position = " ".join(f"WHEN {_sql_str(path)} THEN '{pos}'" for pos, path in sources.items())
+    t = WeatherThresholds()
+
+    con.execute("BEGIN TRANSACTION")
+    con.execute(f"""
+        CREATE OR REPLACE TABLE player_facts AS
+        WITH typed AS (
+            SELECT
+                CASE filename {position} END  AS position,
+                TRIM(Player)                  AS Player_clean,
+                CAST(Year AS INTEGER)         AS year,
+                CAST(Week AS INTEGER)         AS week,
+                {numeric},
+                COALESCE(indoor_outdoor, '')  AS indoor_outdoor,
+                COALESCE(surface_type, '')    AS surface_type
+            FROM {source}
+        )
+        SELECT
+            *,
+            CASE WHEN precip_mm >= {t.rain_mm}  THEN TRUE ELSE FALSE END AS is_rain_game,
+            CASE WHEN wind_kph  >= {t.wind_kph} THEN TRUE ELSE FALSE END AS is_windy_game,
+            CASE WHEN temp_C    <= {t.cold_c}   THEN TRUE ELSE FALSE END AS is_cold_game,
+            CASE
+                WHEN (precip_mm >= {t.rain_mm})
+                  OR (wind_kph >= {t.wind_kph})
+                  OR (temp_C <= {t.cold_c})
+                THEN TRUE ELSE FALSE
+            END AS is_messy_game,
+            CASE
+                WHEN elevation >= 500 THEN 'High'
+                WHEN elevation BETWEEN 100 AND 499 THEN 'Medium'
+                ELSE 'Low'
+            END AS elevation_level,
+            CASE
+                WHEN temp_C IS NULL          THEN NULL
+                WHEN temp_C <= {t.freezing_c} THEN 'Freezing'
+                WHEN temp_C <= {t.cold_c}     THEN 'Cold'
+                WHEN temp_C <= 15            THEN 'Cool'
+                WHEN temp_C <= 25            THEN 'Mild'
+                ELSE 'Warm'
+            END AS temp_band
+        FROM typed
+        ORDER BY year, position, week, Player_clean
+    """)
+    con.execute("DELETE FROM fact_ingest_meta")
+    con.execute(
+        """
+        INSERT INTO fact_ingest_meta
+        SELECT ?, list_sort(list_distinct(list(year))), list_sort(list_distinct(list(position))),
+               count(*), now()::TIMESTAMP
+        FROM player_facts
+        """,
+        [fingerprint],
+    )
+    con.execute("COMMIT")
+    return True
+
+def connect(sources: dict | None = None, db_path: str = FACTS_DB_PATH, force_ingest: bool = False):
+    """
+    Opens the persistent fact database, re-ingesting the CSVs only if they changed.
+
+    Args:
+        sources (dict): {position: csv_path}; defaults to every existing file in POSITION_DATA_PATHS.
+        db_path (str): DuckDB database file (":memory:" for a throwaway copy).
+        force_ingest (bool): Rebuild the fact table even if the sources look unchanged.
+    """
+    import duckdb
+
+    sources = available_sources(sources)
+    if not sources:
+        raise FileNotFoundError("No position CSVs found to build the fact table from")
+    if db_path != ":memory:":
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(db_path)
+    if ingest_player_data(con, sources, force=force_ingest):
+        logging.debug(f"Ingested {', '.join(sorted(sources))} into {db_path}")
+    return con
+
+def run_query(con, sql: str, params: dict) -> pl.DataFrame:
+    """
+    Executes a fixed SQL text with bound named parameters, passing only the ones it references.
+    """
+    used = set(PARAM_RE.findall(sql))
+    return fetch_pl(con, sql, {name: value for name, value in params.items() if name in used})
+
+def scope_params(con, seasons=None, positions=None) -> dict:
+    """
+    Resolves season and position scopes to the bound parameters of SCOPE_SQL.
+
+    Args:
+        seasons (int | Iterable[int] | None): Seasons to include; None means every ingested season.
+        positions (str | Iterable[str] | None): Positions to include; None means all.
+    """
+    all_years, all_positions = con.execute("SELECT years, positions FROM fact_ingest_meta").fetchone()
+    if seasons is None:
+        years = list(all_years)
+    elif isinstance(seasons, int):
+        years = [seasons]
+    else:
+        years = sorted({int(year) for year in seasons})
+    if positions is None:
+        pos = list(all_positions)
+    elif isinstance(positions, str):
+        pos = [positions.upper()]
+    else:
+        pos = sorted({p.upper() for p in positions})
+    if not years or not pos:
+        raise ValueError("seasons and positions must not be empty")
+    return {
+        "years": years, "year_lo": min(years), "year_hi": max(years),
+        "positions": pos, "pos_lo": min(pos), "pos_hi": max(pos),
+    }
+
+def latest_season(con) -> int:
+    return max(con.execute("SELECT years FROM fact_ingest_meta").fetchone()[0])
+
+# Range predicates on the sort keys let DuckDB prune row groups by zone map;
+# the list_contains checks then apply the exact scope.
+SCOPE_SQL = """
+    year BETWEEN $year_lo AND $year_hi AND list_contains($years, year)
+    AND position BETWEEN $pos_lo AND $pos_hi AND list_contains($positions, position)
+"""
+
+# Split dimensions: name -> (value expression, row filter); thresholds are bound parameters
+PARAM_SPLITS = {
+    "indoor_outdoor":  ("indoor_outdoor", "indoor_outdoor IN ('Indoor','Outdoor')"),
+    "surface_type":    ("surface_type", "surface_type IN ('Grass','Turf')"),
+    "elevation_level": ("elevation_level", "TRUE"),
+    "rain_category":   ("CASE WHEN precip_mm >= $rain_mm THEN 'Rain' ELSE 'No Rain' END", "precip_mm IS NOT NULL"),
+    "wind_category":   ("CASE WHEN wind_kph >= $wind_kph THEN 'Windy' ELSE 'Calm' END", "wind_kph IS NOT NULL"),
+    "temp_band": (
+        """CASE
+            WHEN temp_C <= $freezing_c THEN 'Freezing'
+            WHEN temp_C <= $cold_c     THEN 'Cold'
+            WHEN temp_C <= 15          THEN 'Cool'
+            WHEN temp_C <= 25          THEN 'Mild'
+            ELSE 'Warm'
+        END""",
+        "temp_C IS NOT NULL",
+    ),
+    "weather_class": (
+        """CASE
+            WHEN (precip_mm >= $rain_mm) OR (wind_kph >= $wind_kph) OR (temp_C <= $cold_c)
+            THEN 'Messy' ELSE 'Normal'
+        END""",
+        "TRUE",
+    ),
+}
+
+def best_players(con, seasons=None, positions="QB", min_games: int = MIN_GAMES, limit: int = 50):
+    """
+    Average fantasy and passing output per player over the given scope.
+    """
+    sql = f"""
+        SELECT
+            Player_clean AS Player,
+            position,
+            ROUND(AVG(FPTS), 2)     AS avg_fantasy_points,
+            ROUND(AVG(Pass_TD), 2)  AS avg_pass_tds,
+            ROUND(AVG(Pass_Yds), 1) AS avg_pass_yds,
+            COUNT(DISTINCT CAST(year AS VARCHAR) || '-' || CAST(week AS VARCHAR)) AS games_played
+        FROM player_facts
+        WHERE {SCOPE_SQL}
+        GROUP BY Player_clean, position
+        HAVING games_played >= $min_games
+        ORDER BY avg_fantasy_points DESC
+        LIMIT $limit
+    """
+    params = {**scope_params(con, seasons, positions), "min_games": min_games, "limit": limit}
+    return run_query(con, sql, params)
+
+def split_report(con, dimension: str, seasons=None, positions="QB", thresholds: WeatherThresholds | None = None,
+                 min_games: int = MIN_GAMES, limit: int = 25):
+    """
+    Per-player averages split by one dimension of PARAM_SPLITS.
+
+    Args:
+        dimension (str): Key of PARAM_SPLITS; also the output column name.
+        seasons, positions: Scope, as for scope_params.
+        thresholds (WeatherThresholds): Weather cut-offs; defaults to the module constants.
+        min_games (int): Minimum games per player and split value.
+        limit (int): Maximum number of rows.
+    """
+    if dimension not in PARAM_SPLITS:
+        raise ValueError(f"Unknown split dimension: {dimension}")
+    expr, row_filter = PARAM_SPLITS[dimension]
+    sql = f"""
+        SELECT
+            Player_clean AS Player,
+            position,
+            {expr} AS {dimension},
+            ROUND(AVG(FPTS), 2)     AS avg_fantasy_points,
+            ROUND(AVG(Pass_Yds), 1) AS avg_pass_yds,
+            ROUND(AVG(Pass_TD), 2)  AS avg_pass_tds,
+            COUNT(*) AS games
+        FROM player_facts
+        WHERE {SCOPE_SQL} AND {row_filter}
+        GROUP BY ALL
+        HAVING COUNT(*) >= $min_games
+        ORDER BY {dimension}, avg_fantasy_points DESC
+        LIMIT $limit
+    """
+    params = {
+        **scope_params(con, seasons, positions),
+        **(thresholds or WeatherThresholds())._asdict(),
+        "min_games": min_games,
+        "limit": limit,
+    }
+    return run_query(con, sql, params)
+
+def weather_correlations(con, seasons=None, positions="QB", outdoor_only: bool = False):
+    """
+    Correlation of fantasy points with each weather variable over the given scope.
+    """
+    sql = f"""
+        SELECT
+            corr(FPTS, precip_mm)    AS corr_fpts_precip,
+            corr(FPTS, wind_kph)     AS corr_fpts_wind,
+            corr(FPTS, temp_C)       AS corr_fpts_temp,
+            corr(FPTS, rel_humidity) AS corr_fpts_humidity,
+            corr(FPTS, pressure_hpa) AS corr_fpts_pressure,
+            COUNT(*)                 AS games
+        FROM player_facts
+        WHERE {SCOPE_SQL}
+          AND (precip_mm IS NOT NULL OR wind_kph IS NOT NULL OR temp_C IS NOT NULL)
+          AND (NOT $outdoor_only OR indoor_outdoor = 'Outdoor')
+    """
+    params = {**scope_params(con, seasons, positions), "outdoor_only": outdoor_only}
+    return run_query(con, sql, params)
@@ -1,5 +1,6 @@
 import duckdb
 import polars as pl
+from duck_fetch import fetch_pl
 
 
 def clean_name_expr(column: str) -> str:
@@ -30,7 +31,7 @@ def enrich_historical_sql(position: str):
     """)
 
     # Enrich historical with roster and stadium info
-    result = con.execute(f"""
+    result = fetch_pl(con, f"""
         SELECT 
             h.week, h.year, h.Player, h.CMP, h.ATT, h.YDS, h.TD, h.INT, h.FPTS,
             COALESCE(r.home_team_name, h.home_team_name) AS home_team_name,
@@ -40,14 +41,14 @@ def enrich_historical_sql(position: str):
         LEFT JOIN roster_tbl r ON h.player_key = r.player_key
         LEFT JOIN stadiums_tbl s ON {clean_name_expr('COALESCE(r.home_team_name, h.home_team_name)')} = s.home_team_key
         ORDER BY h.year, h.week;
-    """).fetchdf()
+    """)
 
-    missing = result[result['stadium_name'].isnull()]
-    print(f"\nRows missing stadium metadata: {len(missing)}")
-    print(missing[['week', 'year', 'Player', 'home_team_name']].reset_index(drop=True))
+    missing = result.filter(pl.col('stadium_name').is_null())
+    print(f"\nRows missing stadium metadata: {missing.height}")
+    print(missing.select(['week', 'year', 'Player', 'home_team_name']))
 
     output_path = f"data/official_rankings/historical/official_{position}_2020_2025_historical_data.csv"
-    result.to_csv(output_path, index=False)
+    result.write_csv(output_path)
     print(f"Enriched stadium metadata saved to: {output_path}")
 
     # --- Now enrich total_nfl_matchups_with_stadiums.csv with missing stadium info ---
@@ -59,7 +60,7 @@ def enrich_historical_sql(position: str):
     """)
 
     # Update missing stadiums by joining on home_team_name
-    enriched_matchups = con.execute(f"""
+    enriched_pl = fetch_pl(con, f"""
         SELECT 
             m.week, m.year, m.home_team_name, m.away_team_name,
             COALESCE(s.stadium_name, m.stadium_name) AS stadium_name,
@@ -70,20 +71,17 @@ def enrich_historical_sql(position: str):
             COALESCE(s.year_opened, m.year_opened) AS year_opened
         FROM matchups_with_missing m
         LEFT JOIN stadiums_tbl s ON {clean_name_expr('m.home_team_name')} = s.home_team_key
-    """).fetchdf()
+    """)
 
     # Reload all matchups to merge updated missing records back
-    all_matchups = con.execute("SELECT * FROM read_csv_auto('data/nfl_metadata/total_nfl_matchups_with_stadiums.csv', header=True)").fetchdf()
-
-    all_pl = pl.from_pandas(all_matchups)
-    enriched_pl = pl.from_pandas(enriched_matchups)
+    all_pl = fetch_pl(con, "SELECT * FROM read_csv_auto('data/nfl_metadata/total_nfl_matchups_with_stadiums.csv', header=True)")
 
     # Filter out the missing records from all_pl and then append enriched ones
-    filtered_all = all_pl.filter(~all_pl.lazy().filter(
-        (pl.col("stadium_name").is_null()) | (pl.col("stadium_name") == "")
-    ).collect().to_series())
+    filtered_all = all_pl.filter(
+        pl.col("stadium_name").is_not_null() & (pl.col("stadium_name") != "")
+    )
 
-    updated_matchups = filtered_all.vstack(enriched_pl)
+    updated_matchups = pl.concat([filtered_all, enriched_pl], how="diagonal_relaxed")
 
     # Save updated matchups file
     updated_matchups.write_csv('data/nfl_metadata/total_nfl_matchups_with_stadiums.csv')
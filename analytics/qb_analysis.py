@@ -1,63 +1,42 @@
-import duckdb
 import polars as pl
 from pathlib import Path
+from duck_fetch import fetch_pl
+from player_facts import FACTS_DB_PATH, MIN_GAMES, POSITION_DATA_PATHS, available_sources, connect
+from report_cache import ReportCache
+
+DATA_PATH = POSITION_DATA_PATHS["QB"]
+# QB reports read the shared all-positions fact table (see player_facts)
+QB_DB_PATH = FACTS_DB_PATH
+
+# Per-player split dimensions: name -> (value expression, row filter) over qb_season.
+# Adding a split here adds a grouping set to the one-pass cube, not another scan.
+SPLIT_DIMENSIONS = {
+    "indoor_outdoor":  ("indoor_outdoor", "indoor_outdoor IN ('Indoor','Outdoor')"),
+    "surface_type":    ("surface_type", "surface_type IN ('Grass','Turf')"),
+    "elevation_level": ("elevation_level", "TRUE"),
+    "rain_category":   ("CASE WHEN is_rain_game THEN 'Rain' ELSE 'No Rain' END", "precip_mm IS NOT NULL"),
+    "wind_category":   ("CASE WHEN is_windy_game THEN 'Windy' ELSE 'Calm' END", "wind_kph IS NOT NULL"),
+    "temp_band":       ("temp_band", "temp_band IS NOT NULL"),
+    "weather_class":   ("CASE WHEN is_messy_game THEN 'Messy' ELSE 'Normal' END", "TRUE"),
+}
+
+def setup_duckdb_connection(csv_path: str = DATA_PATH, db_path: str = QB_DB_PATH, force_ingest: bool = False):
+    """
+    Opens the shared fact database with `csv_path` as the QB source.
 
-DATA_PATH = "backend/static/data/official_rankings/historical/qb_week_rankings_2020_2025.csv"
-
-# Weather condition thresholds
-RAIN_MM_LIGHT = 0.5
-WIND_KPH_WINDY = 25.0
-COLD_C = 5.0
-FREEZING_C = 0.0
-
-MIN_GAMES = 3
+    `qb_data` and `qb_season` are temp views over the QB rows of the
+    materialized `player_facts` table, so report queries never touch the CSV.
+    """
+    con = connect({**available_sources(), "QB": csv_path}, db_path, force_ingest)
 
-def setup_duckdb_connection(csv_path: str):
-    con = duckdb.connect()
+    max_year = con.execute("SELECT max(year) FROM player_facts WHERE position = 'QB'").fetchone()[0]
+    con.execute("CREATE OR REPLACE TEMP VIEW qb_data AS SELECT * FROM player_facts WHERE position = 'QB'")
+    # View restricted to most recent season (year resolved once here)
     con.execute(f"""
-        CREATE OR REPLACE VIEW qb_data AS
-        SELECT
-
-            TRIM(Player) AS Player_clean,
-
-            CAST(CMP AS DOUBLE)           AS CMP,
-            CAST("Pass_Att" AS DOUBLE)    AS Pass_Att,
-            CAST("Pass_Yds" AS DOUBLE)    AS Pass_Yds,
-            CAST("Pass_TD" AS DOUBLE)     AS Pass_TD,
-            CAST(INT AS DOUBLE)           AS INT,
-            CAST(FPTS AS DOUBLE)          AS FPTS,
-
-            CAST(elevation AS DOUBLE)     AS elevation,
-            CAST(temp_C AS DOUBLE)        AS temp_C,
-            CAST(precip_mm AS DOUBLE)     AS precip_mm,
-            CAST(wind_kph AS DOUBLE)      AS wind_kph,
-            CAST(rel_humidity AS DOUBLE)  AS rel_humidity,
-            CAST(pressure_hpa AS DOUBLE)  AS pressure_hpa,
-
-            CAST(Year AS INTEGER)         AS year,
-            CAST(Week AS INTEGER)         AS week,
-
-            COALESCE(indoor_outdoor, '')  AS indoor_outdoor,
-            COALESCE(surface_type, '')    AS surface_type,
-
-            CASE WHEN precip_mm >= {RAIN_MM_LIGHT}   THEN TRUE ELSE FALSE END AS is_rain_game,
-            CASE WHEN wind_kph  >= {WIND_KPH_WINDY}  THEN TRUE ELSE FALSE END AS is_windy_game,
-            CASE WHEN temp_C    <= {COLD_C}          THEN TRUE ELSE FALSE END AS is_cold_game,
-            CASE
-                WHEN (precip_mm >= {RAIN_MM_LIGHT})
-                  OR (wind_kph >= {WIND_KPH_WINDY})
-                  OR (temp_C <= {COLD_C})
-                THEN TRUE ELSE FALSE
-            END AS is_messy_game
-        FROM read_csv_auto('{csv_path}', header=True, ignore_errors=True)
-    """)
-
-    # View restricted to most recent season
-    con.execute("""
-        CREATE OR REPLACE VIEW qb_season AS
+        CREATE OR REPLACE TEMP VIEW qb_season AS
         SELECT *
         FROM qb_data
-        WHERE year = (SELECT max(year) FROM qb_data)
+        WHERE year = {max_year if max_year is not None else 'NULL'}
     """)
     return con
 
@@ -65,7 +44,7 @@ def season_year(con) -> int:
     return con.execute("SELECT max(year) FROM qb_data").fetchone()[0]
 
 def fetch_pl_df(con, query: str) -> pl.DataFrame:
-    return pl.from_pandas(con.execute(query).fetchdf())
+    return fetch_pl(con, query)
 
 def best_qbs_overall(con):
     q = f"""
@@ -83,153 +62,128 @@ def best_qbs_overall(con):
     """
     return fetch_pl_df(con, q)
 
-def indoor_vs_outdoor(con):
-    q = f"""
-        SELECT
-            Player_clean AS Player,
-            indoor_outdoor,
-            ROUND(AVG(FPTS), 2) AS avg_fantasy_points,
-            COUNT(*) AS games
-        FROM qb_season
-        WHERE indoor_outdoor IN ('Indoor','Outdoor')
-        GROUP BY Player, indoor_outdoor
-        HAVING COUNT(*) >= {MIN_GAMES}
-        ORDER BY avg_fantasy_points DESC
-        LIMIT 25
+def split_cube_sql() -> str:
     """
-    return fetch_pl_df(con, q)
+    Builds the single GROUPING SETS query behind every per-player split report.
 
-def surface_type_impact(con):
-    q = f"""
-        SELECT
-            Player_clean AS Player,
-            surface_type,
-            ROUND(AVG(FPTS), 2) AS avg_fantasy_points,
-            COUNT(*) AS games
-        FROM qb_season
-        WHERE surface_type IN ('Grass','Turf')
-        GROUP BY Player, surface_type
-        HAVING COUNT(*) >= {MIN_GAMES}
-        ORDER BY avg_fantasy_points DESC
-        LIMIT 25
+    Each dimension's value is NULL for rows its report would filter out, so those
+    rows drop out of that grouping set only.
     """
-    return fetch_pl_df(con, q)
-
-def elevation_impact(con):
-    q = f"""
+    dims = ",\n                ".join(
+        f"CASE WHEN {row_filter} THEN {expr} END AS {name}"
+        for name, (expr, row_filter) in SPLIT_DIMENSIONS.items()
+    )
+    dimension = " ".join(f"WHEN GROUPING({name}) = 0 THEN '{name}'" for name in SPLIT_DIMENSIONS)
+    sets = ", ".join(f"(Player, {name})" for name in SPLIT_DIMENSIONS)
+    return f"""
+        WITH split_rows AS (
+            SELECT
+                Player_clean AS Player,
+                FPTS, Pass_Yds, Pass_TD,
+                {dims}
+            FROM qb_season
+        )
         SELECT
-            Player_clean AS Player,
-            CASE
-                WHEN elevation >= 500 THEN 'High'
-                WHEN elevation BETWEEN 100 AND 499 THEN 'Medium'
-                ELSE 'Low'
-            END AS elevation_level,
-            ROUND(AVG(FPTS), 2) AS avg_fantasy_points,
-            COUNT(*) AS games
-        FROM qb_season
-        GROUP BY Player, elevation_level
-        HAVING COUNT(*) >= {MIN_GAMES}
-        ORDER BY avg_fantasy_points DESC
-        LIMIT 25
+            Player,
+            CASE {dimension} END AS dimension,
+            COALESCE({", ".join(SPLIT_DIMENSIONS)}) AS value,
+            COUNT(*)              AS games,
+            SUM(FPTS)             AS fpts_sum,
+            SUM(FPTS * FPTS)      AS fpts_sumsq,
+            AVG(FPTS)             AS avg_fpts,
+            SUM(Pass_Yds)         AS pass_yds_sum,
+            SUM(Pass_Yds * Pass_Yds) AS pass_yds_sumsq,
+            AVG(Pass_Yds)         AS avg_pass_yds,
+            SUM(Pass_TD)          AS pass_td_sum,
+            SUM(Pass_TD * Pass_TD)   AS pass_td_sumsq,
+            AVG(Pass_TD)          AS avg_pass_td
+        FROM split_rows
+        GROUP BY GROUPING SETS ({sets})
     """
-    return fetch_pl_df(con, q)
 
-def rain_game_performance(con):
-    q = f"""
-        SELECT
-            Player_clean AS Player,
-            CASE WHEN precip_mm >= {RAIN_MM_LIGHT} THEN 'Rain' ELSE 'No Rain' END AS rain_category,
-            ROUND(AVG(FPTS), 2)    AS avg_fantasy_points,
-            ROUND(AVG(Pass_Yds),1) AS avg_pass_yds,
-            ROUND(AVG(Pass_TD), 2) AS avg_pass_tds,
-            COUNT(*) AS games
-        FROM qb_season
-        WHERE precip_mm IS NOT NULL
-        GROUP BY Player, rain_category
-        HAVING COUNT(*) >= {MIN_GAMES}
-        ORDER BY rain_category, avg_fantasy_points DESC
-        LIMIT 25
+def build_split_cube(con, rebuild: bool = False):
     """
-    return fetch_pl_df(con, q)
+    Materializes the per player x split-dimension statistics as the temp table `qb_split_cube`.
 
-def windy_game_performance(con):
-    q = f"""
-        SELECT
-            Player_clean AS Player,
-            CASE WHEN wind_kph >= {WIND_KPH_WINDY} THEN 'Windy' ELSE 'Calm' END AS wind_category,
-            ROUND(AVG(FPTS), 2)    AS avg_fantasy_points,
-            ROUND(AVG(Pass_Yds),1) AS avg_pass_yds,
-            ROUND(AVG(Pass_TD), 2) AS avg_pass_tds,
-            COUNT(*) AS games
-        FROM qb_season
-        WHERE wind_kph IS NOT NULL
-        GROUP BY Player, wind_category
-        HAVING COUNT(*) >= {MIN_GAMES}
-        ORDER BY wind_category, avg_fantasy_points DESC
-        LIMIT 25
+    One scan of qb_season covers every dimension in SPLIT_DIMENSIONS; the split
+    reports below are slices of this table.
     """
-    return fetch_pl_df(con, q)
+    exists = con.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE temporary AND table_name = 'qb_split_cube'"
+    ).fetchone()[0]
+    if exists and not rebuild:
+        return
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE qb_split_cube AS
+        SELECT * FROM ({split_cube_sql()})
+        WHERE value IS NOT NULL
+    """)
 
-def temp_band_performance(con):
+def split_slice(con, dimension: str, label: str, with_passing: bool = False,
+                order_by_label: bool = False, limit: int = 25, min_games: int = MIN_GAMES):
+    """
+    Reads one split report from the cube.
+
+    Args:
+        dimension (str): Key of SPLIT_DIMENSIONS.
+        label (str): Output column name for the dimension's value.
+        with_passing (bool): Include average passing yards and TDs.
+        order_by_label (bool): Sort by the dimension value before fantasy points.
+        limit (int): Maximum number of rows.
+        min_games (int): Minimum games in the split.
+    """
+    build_split_cube(con)
+    passing = """
+            ROUND(avg_pass_yds, 1) AS avg_pass_yds,
+            ROUND(avg_pass_td, 2)  AS avg_pass_tds,""" if with_passing else ""
+    order = f"{label}, avg_fantasy_points DESC" if order_by_label else "avg_fantasy_points DESC"
     q = f"""
-        WITH banded AS (
-            SELECT
-                Player_clean AS Player,
-                CASE
-                    WHEN temp_C <= {FREEZING_C} THEN 'Freezing'
-                    WHEN temp_C <= {COLD_C}    THEN 'Cold'
-                    WHEN temp_C <= 15          THEN 'Cool'
-                    WHEN temp_C <= 25          THEN 'Mild'
-                    ELSE 'Warm'
-                END AS temp_band,
-                FPTS, Pass_Yds, Pass_TD
-            FROM qb_season
-            WHERE temp_C IS NOT NULL
-        )
         SELECT
             Player,
-            temp_band,
-            ROUND(AVG(FPTS), 2)    AS avg_fantasy_points,
-            ROUND(AVG(Pass_Yds),1) AS avg_pass_yds,
-            ROUND(AVG(Pass_TD), 2) AS avg_pass_tds,
-            COUNT(*) AS games
-        FROM banded
-        GROUP BY Player, temp_band
-        HAVING COUNT(*) >= {MIN_GAMES}
-        ORDER BY temp_band, avg_fantasy_points DESC
-        LIMIT 50
+            value AS {label},
+            ROUND(avg_fpts, 2)     AS avg_fantasy_points,{passing}
+            games
+        FROM qb_split_cube
+        WHERE dimension = '{dimension}'
+          AND games >= {min_games}
+        ORDER BY {order}
+        LIMIT {limit}
     """
     return fetch_pl_df(con, q)
 
+def indoor_vs_outdoor(con):
+    return split_slice(con, "indoor_outdoor", "indoor_outdoor")
+
+def surface_type_impact(con):
+    return split_slice(con, "surface_type", "surface_type")
+
+def elevation_impact(con):
+    return split_slice(con, "elevation_level", "elevation_level")
+
+def rain_game_performance(con):
+    return split_slice(con, "rain_category", "rain_category", with_passing=True, order_by_label=True)
+
+def windy_game_performance(con):
+    return split_slice(con, "wind_category", "wind_category", with_passing=True, order_by_label=True)
+
+def temp_band_performance(con):
+    return split_slice(con, "temp_band", "temp_band", with_passing=True, order_by_label=True, limit=50)
+
 def messy_weather_performance(con):
-    q = f"""
-        SELECT
-            Player_clean AS Player,
-            CASE WHEN is_messy_game THEN 'Messy' ELSE 'Normal' END AS weather_class,
-            ROUND(AVG(FPTS), 2)    AS avg_fantasy_points,
-            ROUND(AVG(Pass_Yds),1) AS avg_pass_yds,
-            ROUND(AVG(Pass_TD), 2) AS avg_pass_tds,
-            COUNT(*) AS games
-        FROM qb_season
-        GROUP BY Player, weather_class
-        HAVING COUNT(*) >= {MIN_GAMES}
-        ORDER BY weather_class, avg_fantasy_points DESC
-        LIMIT 25
-    """
-    return fetch_pl_df(con, q)
+    return split_slice(con, "weather_class", "weather_class", with_passing=True, order_by_label=True)
 
 def top_qbs_in_messy(con):
+    build_split_cube(con)
     q = f"""
         SELECT
-            Player_clean AS Player,
-            ROUND(AVG(FPTS), 2)    AS avg_fantasy_points_messy,
-            ROUND(AVG(Pass_Yds),1) AS avg_pass_yds_messy,
-            ROUND(AVG(Pass_TD), 2) AS avg_pass_tds_messy,
-            COUNT(*) AS messy_games
-        FROM qb_season
-        WHERE is_messy_game
-        GROUP BY Player
-        HAVING messy_games >= {MIN_GAMES}
+            Player,
+            ROUND(avg_fpts, 2)     AS avg_fantasy_points_messy,
+            ROUND(avg_pass_yds, 1) AS avg_pass_yds_messy,
+            ROUND(avg_pass_td, 2)  AS avg_pass_tds_messy,
+            games AS messy_games
+        FROM qb_split_cube
+        WHERE dimension = 'weather_class' AND value = 'Messy'
+          AND games >= {MIN_GAMES}
         ORDER BY avg_fantasy_points_messy DESC
         LIMIT 25
     """
@@ -259,47 +213,67 @@ def weather_correlations(con):
     """
     return fetch_pl_df(con, q_all), fetch_pl_df(con, q_outdoor)
 
-def main():
+def report_cache(csv_path: str = DATA_PATH, db_path: str = QB_DB_PATH) -> ReportCache:
+    """
+    Report cache over the same sources setup_duckdb_connection ingests; DuckDB is opened only on a miss.
+    """
+    return ReportCache(
+        lambda: setup_duckdb_connection(csv_path, db_path),
+        sources={**POSITION_DATA_PATHS, "QB": csv_path},
+    )
+
+def main(use_cache: bool = True):
     if not Path(DATA_PATH).exists():
         raise FileNotFoundError(f"CSV not found at {DATA_PATH}")
 
-    con = setup_duckdb_connection(DATA_PATH)
-    yr = season_year(con)
+    if use_cache:
+        cache = report_cache(DATA_PATH)
+        run = cache.run
+    else:
+        cache = None
+        con = setup_duckdb_connection(DATA_PATH)
+        run = lambda func: func(con)
+
+    yr = run(season_year)
     print(f"Season year in use: {yr}")
 
     print("\n=== Best QBs Overall ===")
-    print(best_qbs_overall(con))
+    print(run(best_qbs_overall))
 
     print("\n=== Indoor vs Outdoor ===")
-    print(indoor_vs_outdoor(con))
+    print(run(indoor_vs_outdoor))
 
     print("\n=== Surface Type Impact ===")
-    print(surface_type_impact(con))
+    print(run(surface_type_impact))
 
     print("\n=== Elevation Impact ===")
-    print(elevation_impact(con))
+    print(run(elevation_impact))
 
     print("\n=== Rain vs No Rain ===")
-    print(rain_game_performance(con))
+    print(run(rain_game_performance))
 
     print("\n=== Windy vs Calm ===")
-    print(windy_game_performance(con))
+    print(run(windy_game_performance))
 
     print("\n=== Temperature Bands ===")
-    print(temp_band_performance(con))
+    print(run(temp_band_performance))
 
     print("\n=== Messy vs Normal ===")
-    print(messy_weather_performance(con))
+    print(run(messy_weather_performance))
 
     print("\n=== Top QBs in Messy Weather ===")
-    print(top_qbs_in_messy(con))
+    print(run(top_qbs_in_messy))
 
     print("\n=== Correlations ===")
-    df_all, df_outdoor = weather_correlations(con)
+    df_all, df_outdoor = run(weather_correlations)
     print(df_all)
     print(df_outdoor)
 
-    con.close()
+    if cache is not None:
+        print(f"\n{cache.report()}")
+        cache.close()
+    else:
+        con.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,218 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import polars as pl
+
+import duck_fetch
+import player_facts
+from player_facts import available_sources, source_fingerprint
+
+REPORT_CACHE_DIR = "backend/static/data/cache/reports"
+# Bump to drop every cached report after a change the module fingerprints would miss
+REPORT_CACHE_VERSION = 1
+# Modules whose code shapes every report result (shared SQL and ingest, Arrow fetch);
+# the report function's own module is fingerprinted as well
+SHARED_REPORT_MODULES = (player_facts, duck_fetch)
+# Results kept in memory (least recently used first out); the rest are re-read from Parquet
+REPORT_MEMORY_ENTRIES = 32
+
+_MISSING = object()
+
+class ReportCache:
+    """
+    On-disk Parquet cache of report query results.
+
+    Entries are keyed on the report function, its parameters and a fingerprint
+    of the source CSVs (size/mtime) plus the files of the report's own module
+    and SHARED_REPORT_MODULES, so any data or code change produces new keys.
+    The fingerprint is taken from file stats alone: a hit reads Parquet and
+    never opens DuckDB. The connection is opened through `connect_fn` on the
+    first miss only.
+
+    A report may return a DataFrame, a tuple/list of DataFrames, or a
+    JSON-serializable scalar (including None); the manifest records which.
+    """
+
+    def __init__(self, connect_fn, sources: dict | None = None, cache_dir: str = REPORT_CACHE_DIR):
+        self.connect_fn = connect_fn
+        self.sources = sources
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.con = None
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.pruned = 0
+        self._pruned_for = None
+
+    def fingerprint(self, func) -> str:
+        code = []
+        for module_file in sorted({Path(inspect.getfile(obj)) for obj in (func, *SHARED_REPORT_MODULES)}):
+            stat = module_file.stat()
+            code.append([str(module_file), stat.st_size, stat.st_mtime_ns])
+        return json.dumps([
+            REPORT_CACHE_VERSION,
+            source_fingerprint(available_sources(self.sources)),
+            code,
+        ])
+
+    @staticmethod
+    def make_key(func, params: dict, fingerprint: str) -> str:
+        raw = json.dumps([func.__module__, func.__qualname__, params, fingerprint], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def connection(self):
+        if self.con is None:
+            self.con = self.connect_fn()
+        return self.con
+
+    def run(self, func, **params):
+        """
+        Returns func(con, **params), served from the cache when the data is unchanged.
+        """
+        fingerprint = self.fingerprint(func)
+        key = self.make_key(func, params, fingerprint)
+        with self.lock:
+            result = self.memory.get(key, _MISSING)
+            if result is _MISSING:
+                result = self._load(key)
+            if result is not _MISSING:
+                self._remember(key, result)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+            result = func(self.connection(), **params)
+            self._store(key, fingerprint, func, params, result)
+            self._remember(key, result)
+            if self._pruned_for != fingerprint:
+                self.prune(fingerprint, func)
+                self._pruned_for = fingerprint
+            return result
+
+    def _remember(self, key: str, result) -> None:
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > REPORT_MEMORY_ENTRIES:
+            self.memory.popitem(last=False)
+
+    def _load(self, key: str):
+        """
+        Returns the cached result for `key`, or _MISSING (a cached None is a hit).
+        """
+        manifest_path = self.cache_dir / f"{key}.json"
+        if not manifest_path.exists():
+            return _MISSING
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            if manifest["kind"] == "none":
+                return None
+            if manifest["kind"] == "scalar":
+                return manifest["value"]
+            frames = [pl.read_parquet(self.cache_dir / name) for name in manifest["files"]]
+        except (OSError, ValueError, KeyError) as e:
+            logging.debug(f"Dropping unreadable report cache entry {key}: {e}")
+            return _MISSING
+        return frames[0] if manifest["kind"] == "frame" else tuple(frames)
+
+    def _store(self, key: str, fingerprint: str, func, params: dict, result):
+        manifest = {
+            "report": f"{func.__module__}.{func.__qualname__}",
+            "params": json.loads(json.dumps(params, default=str)),
+            "fingerprint": fingerprint,
+        }
+        if result is None:
+            frames, manifest["kind"] = [], "none"
+        elif isinstance(result, pl.DataFrame):
+            frames, manifest["kind"] = [result], "frame"
+        elif isinstance(result, (tuple, list)) and all(isinstance(f, pl.DataFrame) for f in result):
+            frames, manifest["kind"] = list(result), "frames"
+        else:
+            frames, manifest["kind"], manifest["value"] = [], "scalar", result
+        manifest["files"] = []
+        for i, frame in enumerate(frames):
+            name = f"{key}.{i}.parquet"
+            frame.write_parquet(self.cache_dir / name)
+            manifest["files"].append(name)
+        # The manifest is written last (atomically) so a partial entry is never read
+        tmp = self.cache_dir / f"{key}.json.tmp"
+        tmp.write_text(json.dumps(manifest, default=str))
+        os.replace(tmp, self.cache_dir / f"{key}.json")
+        self.writes += 1
+
+    @staticmethod
+    def is_stale(entry_fingerprint: str, fingerprint: str, same_module: bool) -> bool:
+        """
+        Whether an entry's fingerprint can no longer match any current key.
+
+        Any report's entry is stale once the cache version, the source data or a
+        code file both fingerprints cover (at least SHARED_REPORT_MODULES) has
+        changed; an entry of the same module is stale on any difference.
+        """
+        if entry_fingerprint == fingerprint:
+            return False
+        if same_module:
+            return True
+        try:
+            version, data, code = json.loads(entry_fingerprint)
+        except (TypeError, ValueError):
+            return True
+        current_version, current_data, current_code = json.loads(fingerprint)
+        if version != current_version or data != current_data:
+            return True
+        current_files = {path: stat for path, *stat in current_code}
+        return any(path in current_files and stat != current_files[path] for path, *stat in code)
+
+    def prune(self, fingerprint: str, func) -> int:
+        """
+        Deletes entries of any report that were built from older data or code.
+        """
+        removed = 0
+        for manifest_path in self.cache_dir.glob("*.json"):
+            try:
+                manifest = json.loads(manifest_path.read_text())
+            except (OSError, ValueError):
+                continue
+            same_module = manifest.get("report", "").startswith(f"{func.__module__}.")
+            if not self.is_stale(manifest.get("fingerprint"), fingerprint, same_module):
+                continue
+            for name in manifest.get("files", []):
+                (self.cache_dir / name).unlink(missing_ok=True)
+            manifest_path.unlink(missing_ok=True)
+            removed += 1
+        for key in [k for k in self.memory if not (self.cache_dir / f"{k}.json").exists()]:
+            del self.memory[key]
+        self.pruned += removed
+        return removed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "pruned": self.pruned,
+            "opened_duckdb": self.con is not None,
+        }
+
+    def report(self) -> str:
+        s = self.stats()
+        return (
+            f"Report cache: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.1%} hit rate), "
+            f"{s['writes']} writes, {s['pruned']} stale entries pruned, "
+            f"DuckDB {'opened' if s['opened_duckdb'] else 'not opened'}"
+        )
+
+    def close(self) -> None:
+        if self.con is not None:
+            self.con.close()
+            self.con = None
@@ -1,12 +1,10 @@
-import pandas as pd
 import logging
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# pandas and scikit-learn are imported inside the functions that use them so
+# importing this module (from the CLI, a notebook or a test) stays cheap and
+# never trains anything.
+
+DEFAULT_CAREER_FILE = "qb_stats/qb_career_stats/Baker_Mayfield_career_passing_stats.csv"
 
 def prepare_seasonal_data(df):
     df = df.sort_values(by=["Player", "YEAR"])
@@ -18,6 +16,11 @@ def prepare_seasonal_data(df):
     return df.dropna()
 
 def build_pipeline(feature_columns):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
     preprocessor = ColumnTransformer([
         ("scaler", StandardScaler(), feature_columns)
     ])
@@ -28,6 +31,8 @@ def build_pipeline(feature_columns):
     return pipeline
 
 def predict_2025(file_path, target_column, prediction_label):
+    import pandas as pd
+
     df = pd.read_csv(file_path)
     if df is None or df.empty:
         logging.error("Failed to load data or dataset is empty")
@@ -62,5 +67,10 @@ def predict_2025_yards(file_path):
 def predict_2025_td(file_path):
     return predict_2025(file_path, target_column="TD", prediction_label="Predicted_TD_2025")
 
-predict_2025_yards("qb_stats/qb_career_stats/Baker_Mayfield_career_passing_stats.csv")
-predict_2025_td("qb_stats/qb_career_stats/Baker_Mayfield_career_passing_stats.csv")
+def main(file_path=DEFAULT_CAREER_FILE):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    predict_2025_yards(file_path)
+    predict_2025_td(file_path)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,66 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
 import polars as pl
 import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from requests.adapters import HTTPAdapter
 from zoneinfo import ZoneInfo
 from timezonefinder import TimezoneFinder
 
 FILE_IN = "backend/static/data/nfl_metadata/nfl_matchups_enriched.csv"
+FILE_OUT = "backend/static/data/nfl_metadata/nfl_matchups_with_weather.csv"
+
+ERA5_URL = "https://archive-api.open-meteo.com/v1/era5"
+HOURLY_VARS = "temperature_2m,precipitation,relative_humidity_2m,pressure_msl,wind_speed_10m"
+WEATHER_COLS = ["temp_C", "precip_mm", "wind_kph", "rel_humidity", "pressure_hpa"]
+
+CACHE_PATH = "backend/static/data/cache/open_meteo_era5.sqlite"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Keys per `IN (...)` lookup, under SQLite's bound-variable limit
+CACHE_LOOKUP_CHUNK = 500
+# ERA5 lags real time by ~5 days; only days older than this are treated as final
+ERA5_FINAL_AFTER_DAYS = 7
+
+# Async fetch engine: concurrency floats between these bounds, retries back off with full jitter
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 32
+INITIAL_CONCURRENCY = 4
+LATENCY_TARGET_S = 5.0
+MAX_RETRIES = 5
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 60.0
+
+# Tried in order on "<Date> <Time>" with whitespace stripped from Time and upper-cased
+KICKOFF_FORMATS = ["%Y-%m-%d %I:%M%p", "%Y-%m-%d %H:%M", "%m/%d/%Y %I:%M%p"]
+OUTPUT_COLS = ["city", "state", "stadium_name", "Date", "Time", "latitude", "longitude", "timezone"]
+OUTPUT_SCHEMA = {
+    "city": pl.Utf8,
+    "state": pl.Utf8,
+    "stadium_name": pl.Utf8,
+    "Date": pl.Utf8,
+    "Time": pl.Utf8,
+    "latitude": pl.Float64,
+    "longitude": pl.Float64,
+    "timezone": pl.Utf8,
+    "temp_C": pl.Float64,
+    "precip_mm": pl.Float64,
+    "wind_kph": pl.Float64,
+    "rel_humidity": pl.Float64,
+    "pressure_hpa": pl.Float64,
+    "weather_error": pl.Utf8,
+}
+# A matchup already in FILE_OUT with the same keys (and no weather_error) is not fetched again
+MATCH_KEYS = ["stadium_name", "Date", "Time"]
 
 tf = TimezoneFinder()
 
@@ -36,94 +91,534 @@ def round_to_nearest_hour(dt: datetime) -> datetime:
         dt = dt + timedelta(hours=1)
     return dt.replace(minute=0, second=0, microsecond=0)
 
-def fetch_open_meteo_hour(lat: float, lon: float, local_dt: datetime, tz_name: str) -> dict:
-    date_str = local_dt.strftime("%Y-%m-%d")
-    target_iso = round_to_nearest_hour(local_dt).strftime("%Y-%m-%dT%H:00")
-    url = (
-        "https://archive-api.open-meteo.com/v1/era5"
-        f"?latitude={lat}&longitude={lon}"
-        f"&start_date={date_str}&end_date={date_str}"
-        "&hourly=temperature_2m,precipitation,relative_humidity_2m,pressure_msl,wind_speed_10m"
-        f"&timezone={tz_name}"
-    )
-    try:
-        r = requests.get(url, timeout=8)
-        r.raise_for_status()
-        data = r.json()
-        h = data.get("hourly", {})
-        times = h.get("time", [])
-        if not times:
-            return {"temp_C": None, "precip_mm": None, "wind_kph": None, "rel_humidity": None, "pressure_hpa": None}
-        try:
-            idx = times.index(target_iso)
-        except ValueError:
-            return {"temp_C": None, "precip_mm": None, "wind_kph": None, "rel_humidity": None, "pressure_hpa": None}
-        temp_C = h.get("temperature_2m", [None])[idx]
-        precip_mm = h.get("precipitation", [None])[idx]
-        wind_ms = h.get("wind_speed_10m", [None])[idx]
-        rh = h.get("relative_humidity_2m", [None])[idx]
-        p_msl = h.get("pressure_msl", [None])[idx]
-        wind_kph = wind_ms * 3.6 if wind_ms is not None else None
-        pressure_hpa = p_msl
+def empty_weather() -> dict:
+    return dict.fromkeys(WEATHER_COLS)
+
+def nfl_season(dt: datetime) -> int:
+    # January/February playoff games belong to the previous season
+    return dt.year if dt.month >= 3 else dt.year - 1
+
+class FetchError(Exception):
+    """A failed ERA5 request, with whether it is worth retrying and whether upstream is throttling us."""
+
+    def __init__(self, reason: str, retryable: bool = False, throttled: bool = False, retry_after: float | None = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.retryable = retryable
+        self.throttled = throttled
+        self.retry_after = retry_after
+
+class WeatherCache:
+    """
+    Persistent SQLite cache of ERA5 hourly data.
+
+    Entries are content-addressed: one zlib-compressed JSON day of hourly arrays
+    per (lat, lon, date, variables, tz). Least recently used entries are evicted
+    once the stored payloads exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS era5_hourly (
+                key      TEXT PRIMARY KEY,
+                payload  BLOB NOT NULL,
+                size     INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.total_bytes = self.con.execute("SELECT COALESCE(SUM(size), 0) FROM era5_hourly").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(lat: float, lon: float, day: str, tz_name: str, variables: str = HOURLY_VARS) -> str:
+        raw = json.dumps([round(float(lat), 4), round(float(lon), 4), day, variables, tz_name])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: list) -> dict:
+        """
+        Looks up many keys at once; returns {key: hourly_day} for the hits.
+
+        Hits are read with chunked `IN (...)` selects and their access times
+        bumped with one executemany, all in a single transaction.
+        """
+        keys = list(dict.fromkeys(keys))
+        rows = []
+        with self.lock:
+            for i in range(0, len(keys), CACHE_LOOKUP_CHUNK):
+                chunk = keys[i:i + CACHE_LOOKUP_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                rows += self.con.execute(
+                    f"SELECT key, payload FROM era5_hourly WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+            self.hits += len(rows)
+            self.misses += len(keys) - len(rows)
+            if rows:
+                now = time.time()
+                self.con.executemany("UPDATE era5_hourly SET accessed = ? WHERE key = ?", [(now, key) for key, _ in rows])
+                self.con.commit()
+        return {key: json.loads(zlib.decompress(payload)) for key, payload in rows}
+
+    def put(self, key: str, hourly_day: dict) -> None:
+        payload = zlib.compress(json.dumps(hourly_day).encode())
+        with self.lock:
+            old = self.con.execute("SELECT size FROM era5_hourly WHERE key = ?", (key,)).fetchone()
+            self.con.execute(
+                "INSERT OR REPLACE INTO era5_hourly (key, payload, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            self.total_bytes += len(payload) - (old[0] if old else 0)
+            self.writes += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.con.commit()
+
+    def _evict(self) -> None:
+        # Caller holds the lock; drop least recently used entries down to 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        for key, size in self.con.execute("SELECT key, size FROM era5_hourly ORDER BY accessed").fetchall():
+            if self.total_bytes <= target:
+                break
+            self.con.execute("DELETE FROM era5_hourly WHERE key = ?", (key,))
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self.lock:
+            entries = self.con.execute("SELECT COUNT(*) FROM era5_hourly").fetchone()[0]
         return {
-            "temp_C": temp_C,
-            "precip_mm": precip_mm,
-            "wind_kph": wind_kph,
-            "rel_humidity": rh,
-            "pressure_hpa": pressure_hpa,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self.total_bytes,
         }
-    except Exception:
-        return {"temp_C": None, "precip_mm": None, "wind_kph": None, "rel_humidity": None, "pressure_hpa": None}
-
-def process_row(rec: dict) -> dict:
-    lat = float(rec["latitude"])
-    lon = float(rec["longitude"])
-    tz_name = tz_from_latlon(lat, lon)
-    kickoff = parse_kickoff_local(str(rec["Date"]), str(rec["Time"]), tz_name)
-    if kickoff is None:
-        wx = {"temp_C": None, "precip_mm": None, "wind_kph": None, "rel_humidity": None, "pressure_hpa": None}
-    else:
-        wx = fetch_open_meteo_hour(lat, lon, kickoff, tz_name)
+
+    def report(self) -> str:
+        s = self.stats()
+        return (
+            f"Weather cache: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.1%} hit rate), "
+            f"{s['writes']} writes, {s['evictions']} evictions, "
+            f"{s['entries']} entries / {s['bytes'] / 1e6:.1f} MB"
+        )
+
+    def close(self) -> None:
+        with self.lock:
+            self.con.close()
+
+def is_final_day(day: str) -> bool:
+    return date.fromisoformat(day) <= date.today() - timedelta(days=ERA5_FINAL_AFTER_DAYS)
+
+def split_hourly_by_day(hourly: dict) -> dict:
+    """Split ERA5 hourly arrays into {"YYYY-MM-DD": hourly_arrays_for_that_day}."""
+    days = {}
+    for i, t in enumerate(hourly.get("time", [])):
+        days.setdefault(t[:10], []).append(i)
     return {
-        "city": rec["city"],
-        "state": rec.get("state"),
-        "stadium_name": rec.get("stadium_name"),
-        "Date": rec["Date"],
-        "Time": rec["Time"],
+        day: {name: [values[i] for i in idxs] for name, values in hourly.items() if isinstance(values, list)}
+        for day, idxs in days.items()
+    }
+
+def merge_hourly_days(parts: list[dict]) -> dict:
+    merged = {}
+    for part in parts:
+        for name, values in part.items():
+            merged.setdefault(name, []).extend(values)
+    return merged
+
+def request_open_meteo_range(
+    lat: float, lon: float, start_date: str, end_date: str, tz_name: str, session: requests.Session | None = None
+) -> dict:
+    """Fetch the hourly ERA5 arrays for a whole date window. Raises FetchError on failure."""
+    params = {
         "latitude": lat,
         "longitude": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": HOURLY_VARS,
         "timezone": tz_name,
-        **wx,
     }
+    try:
+        r = (session or requests).get(ERA5_URL, params=params, timeout=20)
+    except requests.Timeout:
+        raise FetchError("timeout", retryable=True)
+    except requests.RequestException as exc:
+        raise FetchError(f"connection error: {type(exc).__name__}", retryable=True)
+
+    if r.status_code == 429 or r.status_code >= 500:
+        retry_after = r.headers.get("Retry-After")
+        raise FetchError(
+            f"http {r.status_code}",
+            retryable=True,
+            throttled=True,
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+    if r.status_code != 200:
+        raise FetchError(f"http {r.status_code}")
+    try:
+        return r.json().get("hourly", {})
+    except ValueError:
+        raise FetchError("invalid json", retryable=True)
+
+def fetch_open_meteo_range(
+    lat: float,
+    lon: float,
+    start_date: str,
+    end_date: str,
+    tz_name: str,
+    cache: WeatherCache | None = None,
+    session: requests.Session | None = None,
+) -> dict:
+    """
+    Hourly ERA5 arrays for a date window, served from `cache` where possible.
+
+    Only the span of days missing from the cache is requested; final (past) days
+    from the response are written back so later runs make no network calls.
+    """
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    days = [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+
+    found = {}
+    if cache is not None:
+        keys = {day: WeatherCache.make_key(lat, lon, day, tz_name) for day in days}
+        hits = cache.get_many(list(keys.values()))
+        found = {day: hits[key] for day, key in keys.items() if key in hits}
+
+    missing = [day for day in days if day not in found]
+    if missing:
+        hourly = request_open_meteo_range(lat, lon, missing[0], missing[-1], tz_name, session)
+        for day, part in split_hourly_by_day(hourly).items():
+            if day not in missing:
+                continue
+            found[day] = part
+            if cache is not None and is_final_day(day):
+                cache.put(WeatherCache.make_key(lat, lon, day, tz_name), part)
+
+    return merge_hourly_days([found[day] for day in days if day in found])
+
+def hour_index(hourly: dict) -> dict:
+    return {t: i for i, t in enumerate(hourly.get("time", []))}
+
+def weather_at(hourly: dict, index: dict, local_dt: datetime) -> dict:
+    """Slice the kickoff hour out of the hourly arrays returned by fetch_open_meteo_range."""
+    target_iso = round_to_nearest_hour(local_dt).strftime("%Y-%m-%dT%H:00")
+    idx = index.get(target_iso)
+    if idx is None:
+        return empty_weather()
+
+    def at(name):
+        values = hourly.get(name) or []
+        return values[idx] if idx < len(values) else None
+
+    wind_ms = at("wind_speed_10m")
+    return {
+        "temp_C": at("temperature_2m"),
+        "precip_mm": at("precipitation"),
+        "wind_kph": wind_ms * 3.6 if wind_ms is not None else None,
+        "rel_humidity": at("relative_humidity_2m"),
+        "pressure_hpa": at("pressure_msl"),
+    }
+
+def fetch_open_meteo_hour(
+    lat: float, lon: float, local_dt: datetime, tz_name: str, cache: WeatherCache | None = None
+) -> tuple[dict, str | None]:
+    """
+    Fetch the weather for one kickoff; returns (weather, error) like the plan fetcher.
+
+    A failed fetch yields empty weather plus the failure reason, so callers can
+    record it in weather_error instead of mistaking it for a missing hour.
+    """
+    date_str = round_to_nearest_hour(local_dt).strftime("%Y-%m-%d")
+    try:
+        hourly = fetch_open_meteo_range(lat, lon, date_str, date_str, tz_name, cache)
+    except FetchError as exc:
+        return empty_weather(), exc.reason
+    wx = weather_at(hourly, hour_index(hourly), local_dt)
+    if all(v is None for v in wx.values()):
+        return wx, "no data for kickoff hour"
+    return wx, None
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for the async fetch engine.
+
+    The limit grows by one slot per window of fast, clean responses, shrinks by one
+    when latency exceeds the target and halves on a 429/5xx.
+    """
+
+    def __init__(
+        self,
+        initial: int = INITIAL_CONCURRENCY,
+        minimum: int = MIN_CONCURRENCY,
+        maximum: int = MAX_CONCURRENCY,
+        latency_target: float = LATENCY_TARGET_S,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.peak = 0
+        self.cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    async def __aexit__(self, *exc):
+        async with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
 
-def main():
+    def record_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            self.limit = max(self.minimum, self.limit - 1)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def record_throttle(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+async def fetch_plan_async(
+    plan: dict,
+    limiter: AdaptiveLimiter,
+    executor: ThreadPoolExecutor,
+    session: requests.Session,
+    cache: WeatherCache | None,
+    max_retries: int = MAX_RETRIES,
+) -> tuple[dict, str | None]:
+    """Fetch one planned window with retries. Returns (hourly, failure_reason)."""
+    loop = asyncio.get_running_loop()
+    call = partial(
+        fetch_open_meteo_range,
+        plan["lat"], plan["lon"], plan["start_date"], plan["end_date"], plan["timezone"], cache, session,
+    )
+    for attempt in range(max_retries + 1):
+        async with limiter:
+            started = time.monotonic()
+            try:
+                hourly = await loop.run_in_executor(executor, call)
+            except FetchError as exc:
+                error = exc
+            else:
+                limiter.record_success(time.monotonic() - started)
+                return hourly, None
+
+        if error.throttled:
+            limiter.record_throttle()
+        if not error.retryable or attempt == max_retries:
+            return {}, f"{error.reason} after {attempt + 1} attempt(s)"
+        delay = error.retry_after or random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+        await asyncio.sleep(delay)
+
+async def fetch_plans_async(
+    plans: list[dict], cache: WeatherCache | None = None, max_concurrency: int = MAX_CONCURRENCY
+) -> list[tuple[dict, str | None]]:
+    """Run every planned window through a pooled session under an adaptive concurrency limit."""
+    if not plans:
+        return []
+    limiter = AdaptiveLimiter(maximum=max_concurrency)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        results = await asyncio.gather(
+            *(fetch_plan_async(plan, limiter, executor, session, cache) for plan in plans)
+        )
+    print(f"Weather fetch: peak concurrency {limiter.peak}, final limit {limiter.limit:.1f}")
+    return results
+
+def resolve_timezones(df: pl.DataFrame) -> pl.DataFrame:
+    """Add a `timezone` column, looking up each unique stadium coordinate only once."""
+    coords = df.select("latitude", "longitude").unique()
+    zones = [tz_from_latlon(lat, lon) for lat, lon in coords.iter_rows()]
+    return df.join(
+        coords.with_columns(pl.Series("timezone", zones, dtype=pl.Utf8)),
+        on=["latitude", "longitude"],
+        how="left",
+        maintain_order="left",
+    )
+
+def parse_kickoffs(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Add `kickoff_hour`, the local kickoff rounded to the nearest hour (naive, in `timezone`).
+
+    Date/Time are parsed as whole columns through KICKOFF_FORMATS; rows none of them
+    match are left null for the row-level fallback in prepare_matchups.
+    """
+    stamp = (
+        pl.col("Date").cast(pl.Utf8).str.strip_chars()
+        + pl.lit(" ")
+        + pl.col("Time").cast(pl.Utf8).str.to_uppercase().str.replace_all(r"\s+", "")
+    )
+    kickoff = pl.coalesce([stamp.str.to_datetime(fmt, strict=False) for fmt in KICKOFF_FORMATS])
+    return df.with_columns(
+        (kickoff + pl.duration(minutes=30)).dt.truncate("1h").alias("kickoff_hour")
+    )
+
+def prepare_matchups(df: pl.DataFrame) -> tuple[list[dict], list[datetime | None]]:
+    """Build the output records (weather still empty) and their local kickoff hours."""
+    frame = parse_kickoffs(resolve_timezones(
+        df.with_columns(pl.col("latitude").cast(pl.Float64), pl.col("longitude").cast(pl.Float64))
+    ))
+    rows = frame.select(OUTPUT_COLS).to_dicts()
+    kickoffs = frame["kickoff_hour"].to_list()
+
+    fallback = 0
+    for i, kickoff in enumerate(kickoffs):
+        if kickoff is not None:
+            continue
+        row = rows[i]
+        local_dt = parse_kickoff_local(str(row["Date"]), str(row["Time"]), row["timezone"])
+        if local_dt is not None:
+            kickoffs[i] = round_to_nearest_hour(local_dt).replace(tzinfo=None)
+            fallback += 1
+    if fallback:
+        logging.debug(f"{fallback} kickoffs parsed by the row-level fallback")
+
+    for row, kickoff in zip(rows, kickoffs):
+        row.update(empty_weather())
+        row["weather_error"] = None if kickoff is not None else "unparsed kickoff"
+    return rows, kickoffs
+
+def plan_requests(rows: list[dict], kickoffs: list[datetime | None]) -> list[dict]:
+    """
+    Group matchups into one ERA5 request per stadium per season.
+
+    Each plan covers the [start_date, end_date] window spanning every kickoff hour
+    at that (lat, lon) in the season; `rows` holds the indexes of the matchups it serves.
+    """
+    plans = {}
+    for i, (row, kickoff) in enumerate(zip(rows, kickoffs)):
+        if kickoff is None:
+            continue
+        day = round_to_nearest_hour(kickoff).date()
+        key = (row["latitude"], row["longitude"], row["timezone"], nfl_season(kickoff))
+        plan = plans.get(key)
+        if plan is None:
+            plans[key] = {
+                "lat": row["latitude"],
+                "lon": row["longitude"],
+                "timezone": row["timezone"],
+                "start": day,
+                "end": day,
+                "rows": [i],
+            }
+        else:
+            plan["start"] = min(plan["start"], day)
+            plan["end"] = max(plan["end"], day)
+            plan["rows"].append(i)
+
+    return [
+        {
+            "lat": p["lat"],
+            "lon": p["lon"],
+            "timezone": p["timezone"],
+            "start_date": p["start"].isoformat(),
+            "end_date": p["end"].isoformat(),
+            "rows": p["rows"],
+        }
+        for p in plans.values()
+    ]
+
+def enrich_with_weather(subset: pl.DataFrame, use_cache: bool = True) -> pl.DataFrame:
+    """Fetch kickoff-hour weather for every matchup in `subset`; returns rows in OUTPUT_SCHEMA order."""
+    rows, kickoffs = prepare_matchups(subset)
+    plans = plan_requests(rows, kickoffs)
+    print(f"{len(rows)} matchups -> {len(plans)} weather requests")
+
+    cache = WeatherCache() if use_cache else None
+    results = asyncio.run(fetch_plans_async(plans, cache))
+    for plan, (hourly, error) in zip(plans, results):
+        index = hour_index(hourly)
+        for i in plan["rows"]:
+            if error is not None:
+                rows[i]["weather_error"] = error
+                continue
+            wx = weather_at(hourly, index, kickoffs[i])
+            rows[i].update(wx)
+            if all(v is None for v in wx.values()):
+                rows[i]["weather_error"] = "no data for kickoff hour"
+
+    failures = {}
+    for row in rows:
+        if row["weather_error"] is not None:
+            failures[row["weather_error"]] = failures.get(row["weather_error"], 0) + 1
+    for reason, count in sorted(failures.items(), key=lambda kv: -kv[1]):
+        print(f"[WARN] {count} rows without weather: {reason}")
+
+    if cache is not None:
+        print(cache.report())
+        cache.close()
+
+    return pl.from_dicts(rows, schema=OUTPUT_SCHEMA)
+
+def load_enriched(path: str) -> pl.DataFrame | None:
+    """Previously enriched rows that need no refetch, one per MATCH_KEYS, or None if there is no output yet."""
+    if not os.path.exists(path):
+        return None
+    existing = pl.read_csv(path, schema_overrides={"Date": pl.Utf8, "Time": pl.Utf8, "stadium_name": pl.Utf8})
+    if "weather_error" not in existing.columns:
+        # Outputs from before weather_error recorded failures as all-null weather; refetch those
+        no_weather = pl.all_horizontal([pl.col(c).is_null() for c in WEATHER_COLS])
+        existing = existing.with_columns(
+            pl.when(no_weather).then(pl.lit("legacy: no weather")).otherwise(None).alias("weather_error")
+        )
+    return (
+        existing.select([pl.col(name).cast(dtype) for name, dtype in OUTPUT_SCHEMA.items()])
+        .filter(pl.col("weather_error").is_null())
+        .unique(MATCH_KEYS, keep="last", maintain_order=True)
+    )
+
+def main(use_cache: bool = True, incremental: bool = True):
     df = pl.read_csv(FILE_IN)
     cols = ["Date", "Time", "city", "state", "stadium_name", "latitude", "longitude"]
     subset = (
         df.select(cols)
           .drop_nulls(["Date", "Time", "latitude", "longitude"])
-          .to_dicts()
+          .with_columns(pl.col(MATCH_KEYS).cast(pl.Utf8))
+          .with_row_index("_order")
     )
-    if not subset:
+    if subset.is_empty():
         print("No valid rows")
         return
 
-    out = []
-    with ThreadPoolExecutor(max_workers=5) as ex:
-        futures = [ex.submit(process_row, rec) for rec in subset]
-        for f in as_completed(futures):
-            out.append(f.result())
+    done = load_enriched(FILE_OUT) if incremental else None
+    if done is None:
+        todo, kept = subset, None
+    else:
+        todo = subset.join(done.select(MATCH_KEYS), on=MATCH_KEYS, how="anti")
+        kept = subset.select("_order", *MATCH_KEYS).join(done, on=MATCH_KEYS, how="inner")
+    print(f"{todo.height} of {subset.height} matchups need weather")
 
-    result_df = pl.from_dicts(out).select([
-    "city", "state", "stadium_name", "Date", "Time",
-    "latitude", "longitude","timezone", "temp_C", "precip_mm", 
-    "wind_kph", "rel_humidity", "pressure_hpa"
-])
+    parts = []
+    if kept is not None:
+        parts.append(kept.select("_order", *OUTPUT_SCHEMA))
+    if not todo.is_empty():
+        fetched = enrich_with_weather(todo.drop("_order"), use_cache)
+        parts.append(fetched.with_columns(todo["_order"]).select("_order", *OUTPUT_SCHEMA))
 
+    # Merge back in input order so unchanged rows keep their place in the output file
+    result_df = pl.concat(parts).sort("_order").drop("_order")
 
     print(result_df)
 
-    result_df.write_csv("backend/static/data/nfl_metadata/nfl_matchups_with_weather.csv")
+    result_df.write_csv(FILE_OUT)
 
 if __name__ == "__main__":
     main()
@@ -4,11 +4,139 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
 import warnings
 import polars as pl
+import requests
+from collections import Counter, defaultdict
+from requests.adapters import HTTPAdapter
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 warnings.filterwarnings("ignore")
 
+BASE_URL = "https://www.nfl.com"
+DEFAULT_WORKERS = 4
+
+WEEK_SELECTOR = "a.nfl-c-matchup-strip__left-area"
+VENUE_SELECTOR = "div[class*='r-color-zyhucb']"
+# Matchup strips of neutral-site / international games carry a marker class or label
+NEUTRAL_SITE_RE = re.compile(r"neutral|international", re.IGNORECASE)
+STATIC_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+    )
+}
+
+VENUE_CACHE_PATH = "backend/static/data/cache/nfl_game_venues.sqlite"
+VENUE_TTL_DAYS = 90
+
+class VenueCache:
+    """
+    Persistent game URL -> venue cache shared across runs and seasons.
+
+    Behaves like the old in-memory dict for scrape_game_location. Entries older
+    than `ttl_days` (or every entry, with `refresh=True`) read as missing so the
+    game page is loaded again. Failed lookups (None) are remembered for this run
+    only. A second table keeps each team's last known home venue, learned from
+    non-neutral-site home games only, as a fallback for game pages that fail
+    to load.
+    """
+
+    def __init__(self, path=VENUE_CACHE_PATH, ttl_days=VENUE_TTL_DAYS, refresh=False):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl_s = ttl_days * 86400
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        self.memory = {}
+        self.hits = 0
+        self.misses = 0
+        self.con = sqlite3.connect(path, check_same_thread=False)
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS game_venue (url TEXT PRIMARY KEY, location TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS team_venue (team TEXT PRIMARY KEY, location TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.con.commit()
+
+    def _lookup(self, url):
+        if url in self.memory:
+            return True, self.memory[url]
+        if self.refresh:
+            return False, None
+        row = self.con.execute(
+            "SELECT location FROM game_venue WHERE url = ? AND fetched_at >= ?", (url, time.time() - self.ttl_s)
+        ).fetchone()
+        if row is None:
+            return False, None
+        self.memory[url] = row[0]
+        return True, row[0]
+
+    def __contains__(self, url):
+        with self.lock:
+            found, _ = self._lookup(url)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return found
+
+    def __getitem__(self, url):
+        with self.lock:
+            found, location = self._lookup(url)
+        if not found:
+            raise KeyError(url)
+        return location
+
+    def get(self, url, default=None):
+        with self.lock:
+            found, location = self._lookup(url)
+        return location if found else default
+
+    def __setitem__(self, url, location):
+        with self.lock:
+            self.memory[url] = location
+            if location is not None:
+                self.con.execute(
+                    "INSERT OR REPLACE INTO game_venue (url, location, fetched_at) VALUES (?, ?, ?)",
+                    (url, location, time.time()),
+                )
+                self.con.commit()
+
+    def home_venue(self, team):
+        with self.lock:
+            row = self.con.execute("SELECT location FROM team_venue WHERE team = ?", (team,)).fetchone()
+        return row[0] if row else None
+
+    def set_home_venue(self, team, location):
+        with self.lock:
+            self.con.execute(
+                "INSERT OR REPLACE INTO team_venue (team, location, updated_at) VALUES (?, ?, ?)",
+                (team, location, time.time()),
+            )
+            self.con.commit()
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"Venue cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate)"
+
+    def close(self):
+        with self.lock:
+            self.con.close()
+
 def build_driver():
     options = Options()
     options.headless = True
@@ -17,41 +145,84 @@ def build_driver():
     options.add_argument("--window-size=1920,1080")
     return webdriver.Chrome(options=options)
 
-def scrape_game_location(driver, url, cache):
+class TieredFetcher:
+    """
+    Page fetcher that only starts a browser when it has to.
+
+    Each page is first requested over plain HTTP and parsed with the fastest
+    available parser; if the markup we need (`selector`) is not in the static
+    HTML, the page is rendered in a lazily built Selenium driver instead.
+    `tiers` counts which tier ("static", "browser" or "failed") served each page.
+    """
+
+    def __init__(self, session, driver_factory=build_driver, static=True):
+        self.session = session
+        self.driver_factory = driver_factory
+        self.static = static
+        self.driver = None
+        self.browser_started = False
+        self.tiers = {"static": 0, "browser": 0, "failed": 0}
+
+    def fetch(self, url, selector, timeout=10):
+        """Return (soup, tier) for `url`; soup is None when neither tier found `selector`."""
+        if self.static:
+            try:
+                response = self.session.get(url, headers=STATIC_HEADERS, timeout=timeout)
+                if response.status_code == 200:
+                    soup = BeautifulSoup(response.text, HTML_PARSER)
+                    if soup.select_one(selector):
+                        return self._served(soup, "static", url)
+            except requests.RequestException:
+                pass
+
+        try:
+            if self.driver is None:
+                self.driver = self.driver_factory()
+                self.browser_started = True
+            self.driver.get(url)
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+            return self._served(BeautifulSoup(self.driver.page_source, HTML_PARSER), "browser", url)
+        except Exception as e:
+            print(f"Failed to load {url}: {e}")
+            return self._served(None, "failed", url)
+
+    def _served(self, soup, tier, url):
+        self.tiers[tier] += 1
+        print(f"[{tier}] {url}")
+        return soup, tier
+
+    def quit(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+def scrape_game_location(fetcher, url, cache):
     if url in cache:
         return cache[url]
 
-    driver.get(url)
-    try:
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='r-color-zyhucb']"))
-        )
-        html = driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
-        venue_div = soup.select_one("div[class*='r-color-zyhucb']")
-        location = venue_div.text.strip() if venue_div else None
-    except Exception as e:
-        print(f"Failed to load game page {url}: {e}")
-        location = None
-
+    location = load_game_location(fetcher, url)
     cache[url] = location
     return location
 
-def scrape_week(driver, year, week, cache):
-    url = f"https://www.nfl.com/schedules/{year}/REG{week}/"
-    driver.get(url)
+def load_game_location(fetcher, url):
+    soup, _ = fetcher.fetch(url, VENUE_SELECTOR, timeout=10)
+    venue_div = soup.select_one(VENUE_SELECTOR) if soup else None
+    return venue_div.text.strip() if venue_div else None
 
-    try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "nfl-c-matchup-strip__left-area"))
-        )
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-    except Exception as e:
-        print(f"Week {week} failed to load: {e}")
-        return []
+def is_neutral_site(link):
+    """True if a matchup strip is marked as a neutral-site game (by class or label text)."""
+    for node in [link, *link.find_all(True)]:
+        if any(NEUTRAL_SITE_RE.search(cls) for cls in node.get("class") or []):
+            return True
+    return bool(NEUTRAL_SITE_RE.search(link.get_text(" ", strip=True)))
 
+def parse_week(html, base_url=BASE_URL):
+    """Parse a schedule page (HTML or soup) into one dict per game (teams, kickoff text, game page URL, neutral-site flag)."""
+    soup = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, HTML_PARSER)
     games = []
-    for idx, link in enumerate(soup.select("a.nfl-c-matchup-strip__left-area"), 1):
+    for idx, link in enumerate(soup.select(WEEK_SELECTOR), 1):
         game_div = link.select_one("div.nfl-c-matchup-strip__game")
         if not game_div:
             continue
@@ -73,37 +244,167 @@ def scrape_week(driver, year, week, cache):
         tz = link.select_one("span.nfl-c-matchup-strip__date-timezone")
         time = f"{date.text.strip()} {tz.text.strip()}" if date and tz else None
 
-        game_url = f"https://www.nfl.com{link.get('href')}"
-        location = scrape_game_location(driver, game_url, cache)
+        games.append({
+            "game_number": idx,
+            "teams": teams,
+            "time": time,
+            "game_url": f"{base_url}{link.get('href')}",
+            "neutral_site": is_neutral_site(link),
+        })
+    return games
+
+def scrape_week(fetcher, year, week, base_url=BASE_URL):
+    url = f"{base_url}/schedules/{year}/REG{week}/"
+    soup, _ = fetcher.fetch(url, WEEK_SELECTOR, timeout=15)
+    if soup is None:
+        print(f"Week {week} failed to load")
+        return []
+    return parse_week(soup, base_url)
+
+def home_team(game):
+    # Matchup strips list the away team first and the home team last
+    return game["teams"][-1]["abbreviation"] if game["teams"] else None
 
-        for team in teams:
-            games.append({
+def game_rows(week, games, cache):
+    rows = []
+    for game in games:
+        location = cache.get(game["game_url"])
+        if location is None and isinstance(cache, VenueCache) and home_team(game) and not game.get("neutral_site"):
+            location = cache.home_venue(home_team(game))
+        for team in game["teams"]:
+            rows.append({
                 "week": week,
-                "game_number": idx,
+                "game_number": game["game_number"],
                 "team_abbreviation": team["abbreviation"],
                 "team_fullname": team["fullname"],
                 "team_record": team["record"],
-                "time": time,
+                "time": game["time"],
                 "location": location
             })
-    print(games)
+    return rows
 
-    return games
+def scrape_schedules(
+    years,
+    workers=DEFAULT_WORKERS,
+    base_url=BASE_URL,
+    driver_factory=build_driver,
+    location_cache=None,
+    static=True,
+):
+    """
+    Scrape the regular-season schedule for every year with a pool of fetchers.
+
+    Week pages and game pages share one work queue: each week task queues its
+    not-yet-seen game URLs, so game-location loads spread across all workers.
+    Each worker serves pages from static HTML when it can and only builds its
+    browser the first time a page needs rendering; browsers are reused for
+    every year and are always quit on exit.
+    Game URLs already in `location_cache` (a VenueCache or plain dict) are not loaded.
 
-def main(year=2025):
-    driver = build_driver()
-    location_cache = {}
-    all_games = []
+    Returns {year: [row, ...]} with rows in week/game order.
+    """
+    tasks = queue.Queue()
+    for year in years:
+        for week in range(1, 19):
+            tasks.put(("week", year, week))
 
-    for week in range(1, 19):
-        print(f"Scraping week {week}")
-        all_games.extend(scrape_week(driver, year, week, location_cache))
+    weeks = {}
+    if location_cache is None:
+        location_cache = {}
+    seen_urls = set()
+    lock = threading.Lock()
+
+    def work(fetcher):
+        while True:
+            task = tasks.get()
+            if task is None:
+                tasks.task_done()
+                return
+            try:
+                if task[0] == "week":
+                    _, year, week = task
+                    print(f"Scraping {year} week {week}")
+                    games = scrape_week(fetcher, year, week, base_url)
+                    with lock:
+                        weeks[(year, week)] = games
+                        for game in games:
+                            if game["game_url"] in seen_urls:
+                                continue
+                            seen_urls.add(game["game_url"])
+                            if game["game_url"] not in location_cache:
+                                tasks.put(("game", game["game_url"]))
+                else:
+                    location_cache[task[1]] = load_game_location(fetcher, task[1])
+            except Exception as e:
+                print(f"Task {task} failed: {e}")
+            finally:
+                tasks.task_done()
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    fetchers = [TieredFetcher(session, driver_factory, static) for _ in range(workers)]
+    try:
+        threads = [threading.Thread(target=work, args=(f,), daemon=True) for f in fetchers]
+        for t in threads:
+            t.start()
+        tasks.join()
+        for _ in threads:
+            tasks.put(None)
+        for t in threads:
+            t.join()
+    finally:
+        for fetcher in fetchers:
+            try:
+                fetcher.quit()
+            except Exception as e:
+                print(f"Failed to quit driver: {e}")
+        session.close()
+
+    served = {tier: sum(f.tiers[tier] for f in fetchers) for tier in ("static", "browser", "failed")}
+    browsers = sum(1 for f in fetchers if f.browser_started)
+    print(
+        f"Pages served: {served['static']} static, {served['browser']} browser, "
+        f"{served['failed']} failed ({browsers} browser(s) started)"
+    )
+
+    if isinstance(location_cache, VenueCache):
+        # Each team's fallback is its most common venue over the season's non-neutral
+        # home games, so a neutral-site game (flagged or not) never becomes its home;
+        # later seasons win so stadium moves are picked up.
+        for year in sorted(years):
+            venues = defaultdict(Counter)
+            for week in range(1, 19):
+                for game in weeks.get((year, week), []):
+                    location = location_cache.get(game["game_url"])
+                    if location and home_team(game) and not game.get("neutral_site"):
+                        venues[home_team(game)][location] += 1
+            for team, counts in venues.items():
+                location_cache.set_home_venue(team, counts.most_common(1)[0][0])
+
+    return {
+        year: [
+            row
+            for week in range(1, 19)
+            for row in game_rows(week, weeks.get((year, week), []), location_cache)
+        ]
+        for year in years
+    }
+
+def main(years=(2025,), workers=DEFAULT_WORKERS, refresh_venues=False, static=True):
+    venue_cache = VenueCache(refresh=refresh_venues)
+    try:
+        schedules = scrape_schedules(years, workers, location_cache=venue_cache, static=static)
+        print(venue_cache.report())
+    finally:
+        venue_cache.close()
 
-    driver.quit()
-    df = pl.DataFrame(all_games)
-    df.write_csv(f"nfl_schedule_{year}.csv")
-    print(df)
-    print(f"Saved to nfl_schedule_{year}.csv")
+    for year, all_games in schedules.items():
+        df = pl.DataFrame(all_games)
+        df.write_csv(f"nfl_schedule_{year}.csv")
+        print(df)
+        print(f"Saved to nfl_schedule_{year}.csv")
 
 if __name__ == "__main__":
     main()
@@ -3,53 +3,349 @@
 # Author: Patrick Mejia
 
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from datetime import datetime, timezone
+import argparse
 import logging
 import os
 import re
+import time
+import tracemalloc
 import requests
+from requests.adapters import HTTPAdapter
 import polars as pl
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+POSITIONS = ["QB", "RB", "WR", "TE"]
+MAX_CONCURRENCY = 6
+
+# "Christian McCaffrey SF (9)" -> player, team, bye week
+PLAYER_CELL_RE = r"^(?P<Player>.+?)\s+(?P<Team>[A-Z]{2,3})\s*(?:\((?P<Bye>\d+)\))?$"
+TABLE_START_RE = re.compile(r"<table\b", re.IGNORECASE)
+
+# Append-only ADP history: data/adp_store/year=2024/position=QB/<snapshot>.parquet
+ADP_STORE_PATH = "data/adp_store"
+
+
+class FirstTableExtractor(HTMLParser):
+    """
+    Streaming parser for the first <table> of a page.
+
+    Collects header (<th>) and row (<td>) cell text, joining a cell's text
+    nodes with single spaces, and sets `done` at the first table's closing tag
+    so the caller can stop feeding the rest of the document.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.headers = []
+        self.rows = []
+        self.done = False
+        self._depth = 0
+        self._row = None
+        self._cell = None
+        self._cell_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self._depth += 1
+        elif self._depth == 1 and tag == "tr":
+            self._close_row()
+            self._row = []
+        elif self._depth == 1 and tag in ("th", "td"):
+            self._close_cell()
+            self._cell = []
+            self._cell_tag = tag
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == "table":
+            self._depth -= 1
+            if self._depth == 0:
+                self._close_row()
+                self.done = True
+        elif self._depth == 1 and tag in ("th", "td"):
+            self._close_cell()
+        elif self._depth == 1 and tag == "tr":
+            self._close_row()
+
+    def handle_data(self, data):
+        if self._cell is not None and self._depth == 1:
+            self._cell.append(data)
+
+    def _close_cell(self):
+        if self._cell is None:
+            return
+        text = " ".join(part for part in (chunk.strip() for chunk in self._cell) if part)
+        if self._cell_tag == "th":
+            self.headers.append(text)
+        elif self._row is not None:
+            self._row.append(text)
+        self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row:
+            self.rows.append(self._row)
+        self._row = None
+
+
+def extract_first_table(html_content, chunk_size=64 * 1024):
+    """Return (headers, rows) of the first table, feeding the parser only until that table closes."""
+    match = TABLE_START_RE.search(html_content)
+    if not match:
+        return [], []
+    parser = FirstTableExtractor()
+    for offset in range(match.start(), len(html_content), chunk_size):
+        parser.feed(html_content[offset:offset + chunk_size])
+        if parser.done:
+            break
+    parser._close_row()
+    return parser.headers, parser.rows
+
+
+def adp_frame(headers, data):
+    """
+    Build a typed DataFrame from table headers and rows.
+
+    Rows are padded or truncated to the header width. "Rank" becomes an integer,
+    every other fully numeric column (the ADP sources and AVG) a float, and the
+    "Player Team (Bye)" column is split into Player, Team and Bye.
+    """
+    width = len(headers)
+    padded = [row[:width] + [None] * (width - len(row)) for row in data]
+    columns = list(zip(*padded)) if padded else [[] for _ in headers]
+    df = pl.DataFrame(
+        {header: pl.Series(header, column, dtype=pl.Utf8) for header, column in zip(headers, columns)}
+    )
+
+    exprs = []
+    for name in df.columns:
+        col = df[name]
+        if name == "Rank":
+            exprs.append(pl.col(name).cast(pl.Int64, strict=False))
+        elif name.startswith("Player"):
+            parts = pl.col(name).str.extract_groups(PLAYER_CELL_RE)
+            exprs.extend([
+                pl.coalesce(parts.struct.field("Player"), pl.col(name)).alias("Player"),
+                parts.struct.field("Team").alias("Team"),
+                parts.struct.field("Bye").cast(pl.Int64, strict=False).alias("Bye"),
+            ])
+        elif name != "POS":
+            as_float = col.str.replace_all(",", "").cast(pl.Float64, strict=False)
+            missing = col.is_null() | (col.str.strip_chars() == "")
+            if as_float.null_count() == missing.sum():
+                exprs.append(pl.col(name).str.replace_all(",", "").cast(pl.Float64, strict=False))
+            else:
+                exprs.append(pl.col(name))
+        else:
+            exprs.append(pl.col(name))
+    return df.select(exprs)
+
+
+def legacy_table_frame(html_content):
+    """The original BeautifulSoup + dict-comprehension path, kept as the benchmark baseline."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    table = soup.find("table")
+    if not table:
+        return pl.DataFrame()
+    headers = [th.get_text().strip() for th in table.find_all("th")]
+    rows = table.find_all("tr")[1:]
+    data = [[td.get_text().strip() for td in row.find_all("td")] for row in rows]
+    return pl.DataFrame({header: [row[i] if i < len(row) else None for row in data] for i, header in enumerate(headers)})
+
+
+def benchmark_parse(html_paths, repeat=5):
+    """Compare parse time and peak memory of the legacy and streaming table paths on saved pages."""
+    paths = {
+        "bs4 html.parser": legacy_table_frame,
+        "streaming": lambda html: adp_frame(*extract_first_table(html)),
+    }
+    for path in html_paths:
+        with open(path, encoding="utf-8") as fh:
+            html_content = fh.read()
+        logging.info(f"Benchmark {path} ({len(html_content) / 1024:.0f} KiB, {repeat} runs)")
+        for label, fn in paths.items():
+            tracemalloc.start()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                df = fn(html_content)
+            elapsed = (time.perf_counter() - started) / repeat
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            logging.info(f"  {label:<16} {elapsed * 1000:8.1f} ms/run  peak {peak / 1e6:6.1f} MB  {df.shape}")
+
+
+class ADPStore:
+    """
+    Append-only columnar ADP history, Hive-partitioned by year and position.
+
+    Every append writes a new snapshot file with a `snapshot_ts`; queries read
+    the latest snapshot per (year, position) in a single lazy scan, and filters
+    on year/position prune the partitions they do not need.
+    """
+
+    def __init__(self, root=ADP_STORE_PATH):
+        self.root = root
+
+    @staticmethod
+    def normalize(df, snapshot_ts):
+        """Map a typed adp_frame onto the store's fixed schema."""
+        def column(name, dtype):
+            return pl.col(name).cast(dtype) if name in df.columns else pl.lit(None, dtype=dtype)
+
+        return df.select(
+            column("Player", pl.Utf8).alias("player"),
+            column("Player", pl.Utf8).str.strip_chars().str.to_lowercase().alias("player_key"),
+            column("Team", pl.Utf8).alias("team"),
+            column("Bye", pl.Int64).alias("bye"),
+            column("Rank", pl.Int64).alias("rank"),
+            column("POS", pl.Utf8).str.extract(r"^([A-Z]+)").alias("position"),
+            column("POS", pl.Utf8).str.extract(r"(\d+)$").cast(pl.Int64, strict=False).alias("pos_rank"),
+            column("AVG", pl.Float64).alias("adp"),
+            pl.lit(snapshot_ts, dtype=pl.Datetime("us", "UTC")).alias("snapshot_ts"),
+        )
+
+    def append(self, df, year, snapshot_ts=None):
+        """Write one snapshot file per position found in `df`; returns the number of rows stored."""
+        snapshot_ts = snapshot_ts or datetime.now(timezone.utc)
+        rows = self.normalize(df, snapshot_ts).filter(pl.col("position").is_not_null())
+        for (position,), group in rows.group_by("position", maintain_order=True):
+            directory = os.path.join(self.root, f"year={year}", f"position={position}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{snapshot_ts:%Y%m%dT%H%M%S%f}.parquet")
+            group.drop("position").write_parquet(path)
+        return rows.height
+
+    def has_snapshots(self):
+        for _, _, files in os.walk(self.root):
+            if any(name.endswith(".parquet") for name in files):
+                return True
+        return False
+
+    def empty_frame(self):
+        """A zero-row frame with the columns a scan of the store yields."""
+        return (
+            self.normalize(pl.DataFrame(), datetime.now(timezone.utc))
+            .clear()
+            .drop("position")
+            .with_columns(pl.lit(None, dtype=pl.Int32).alias("year"), pl.lit(None, dtype=pl.Utf8).alias("position"))
+        )
+
+    def scan(self, years=None, positions=None, latest_only=True):
+        # scan_parquet raises on a glob that matches nothing, so an empty store scans as an empty frame
+        if not self.has_snapshots():
+            return self.empty_frame().lazy()
+        lf = pl.scan_parquet(
+            os.path.join(self.root, "**", "*.parquet"),
+            hive_partitioning=True,
+            hive_schema={"year": pl.Int32, "position": pl.Utf8},
+        )
+        if years is not None:
+            lf = lf.filter(pl.col("year").is_in(list(years)))
+        if positions is not None:
+            lf = lf.filter(pl.col("position").is_in(list(positions)))
+        if latest_only:
+            lf = lf.filter(pl.col("snapshot_ts") == pl.col("snapshot_ts").max().over("year", "position"))
+        return lf
+
+    def player_history(self, player):
+        """Latest ADP and rank per season for one player, with the change from the previous season."""
+        key = player.strip().lower()
+        return (
+            self.scan()
+            .filter(pl.col("player_key") == key)
+            .sort("year")
+            .with_columns(
+                (pl.col("adp") - pl.col("adp").shift(1)).alias("adp_delta"),
+                (pl.col("rank") - pl.col("rank").shift(1)).alias("rank_delta"),
+            )
+            .select("year", "player", "team", "position", "rank", "pos_rank", "adp", "adp_delta", "rank_delta")
+            .collect()
+        )
+
+    def rank_deltas(self, from_year, to_year, position=None):
+        """Players present in both seasons, ordered by how far their ADP rose (negative adp_delta first)."""
+        lf = self.scan(years=[from_year, to_year], positions=[position] if position else None)
+        keep = ["player_key", "position", "rank", "adp"]
+        before = lf.filter(pl.col("year") == from_year).select(keep)
+        after = lf.filter(pl.col("year") == to_year).select(keep + ["player", "team"])
+        return (
+            after.join(before, on=["player_key", "position"], suffix=f"_{from_year}")
+            .select(
+                "player", "team", "position",
+                pl.col(f"rank_{from_year}"), pl.col("rank").alias(f"rank_{to_year}"),
+                pl.col(f"adp_{from_year}"), pl.col("adp").alias(f"adp_{to_year}"),
+                (pl.col("rank") - pl.col(f"rank_{from_year}")).alias("rank_delta"),
+                (pl.col("adp") - pl.col(f"adp_{from_year}")).alias("adp_delta"),
+            )
+            .sort("adp_delta")
+            .collect()
+        )
+
+    def position_percentiles(self, years=None, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        """ADP quantiles for every (year, position) in one grouped pass."""
+        return (
+            self.scan(years=years)
+            .group_by("year", "position")
+            .agg(
+                pl.len().alias("players"),
+                *[pl.col("adp").quantile(q).alias(f"adp_p{int(q * 100)}") for q in quantiles],
+            )
+            .sort("year", "position")
+            .collect()
+        )
+
+
 class DraftCalculator:
-    def __init__(self, base_url):
+    def __init__(self, base_url, max_concurrency=MAX_CONCURRENCY):
         self.base_url = base_url
+        self.max_concurrency = max_concurrency
         self.headers = {
             "User-Agent": (
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                 "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
             )
         }
+        # One keep-alive pool shared by every fetch, sized for parse_many's concurrency
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
-    def fetch_data(self, position, year):
-        """Fetch the HTML page content for a given position and year."""
+    def request_page(self, position, year):
+        """Fetch the HTML page content for a given position and year, raising on failure."""
         url = f"{self.base_url}{position.lower()}.php?year={year}"
         logging.info(f"Fetching data from: {url}")
+        response = self.session.get(url, timeout=10)
+        if response.status_code != 200:
+            raise requests.HTTPError(f"HTTP {response.status_code} for {url}")
+        return response.text
 
+    def fetch_data(self, position, year):
+        """Fetch the HTML page content for a given position and year."""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            if response.status_code != 200:
-                logging.error(f"Failed to fetch data: {response.status_code}")
-                return None
-            return response.text
+            return self.request_page(position, year)
+        except requests.HTTPError as e:
+            logging.error(f"Failed to fetch data: {e}")
+            return None
         except requests.RequestException as e:
             logging.error(f"Request failed: {e}")
             return None
 
-    def parse_data(self, html_content):
-        """Parse HTML content and extract table headers and rows."""
-        soup = BeautifulSoup(html_content, "html.parser")
-        table = soup.find("table")
-        if not table:
+    @staticmethod
+    def parse_data(html_content):
+        """Parse HTML content and extract the first table's headers and rows."""
+        headers, data = extract_first_table(html_content)
+        if not headers and not data:
             logging.warning("No table found in the page content.")
-            return [], []
-
-        headers = [th.get_text().strip() for th in table.find_all("th")]
-        rows = table.find_all("tr")[1:]  # Skip header row
-        data = [[td.get_text().strip() for td in row.find_all("td")] for row in rows]
-
-        # logging.info(f"Testing Rows:  {data[:3]}")
         return headers, data
 
     def parse_position(self, position, year):
@@ -59,16 +355,78 @@ class DraftCalculator:
             return [], []
         return self.parse_data(html_content)
 
+    def parse_many(self, years, positions=POSITIONS, parse_workers=None):
+        """
+        Fetch and parse every (year, position) page concurrently.
+
+        Pages are fetched on up to `max_concurrency` threads over the shared
+        session; each page is parsed in a process pool as soon as it arrives.
+        Returns {(year, position): {"headers", "data", "error"}}, where error is
+        None on success or a short reason string.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as fetch_pool, \
+                ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+            fetches = {
+                fetch_pool.submit(self.request_page, position, year): (year, position)
+                for year in years
+                for position in positions
+            }
+            parses = {}
+            for future in as_completed(fetches):
+                key = fetches[future]
+                try:
+                    html_content = future.result()
+                except requests.RequestException as e:
+                    results[key] = {"headers": [], "data": [], "error": f"fetch failed: {e}"}
+                    continue
+                parses[parse_pool.submit(self.parse_data, html_content)] = key
+
+            for future in as_completed(parses):
+                key = parses[future]
+                try:
+                    headers, data = future.result()
+                except Exception as e:
+                    results[key] = {"headers": [], "data": [], "error": f"parse failed: {e}"}
+                    continue
+                error = None if headers and data else "no table data"
+                results[key] = {"headers": headers, "data": data, "error": error}
+
+        return {key: results[key] for key in sorted(results)}
+
+    @staticmethod
+    def summarize(results):
+        """Log one line per (year, position) and return the failures as {(year, position): reason}."""
+        failures = {}
+        for (year, position), result in results.items():
+            if result["error"]:
+                failures[(year, position)] = result["error"]
+                logging.warning(f"{year} {position}: {result['error']}")
+            else:
+                logging.info(f"{year} {position}: {len(result['data'])} rows")
+        logging.info(f"Parsed {len(results) - len(failures)}/{len(results)} pages, {len(failures)} failed")
+        return failures
+
+    def save_many(self, results, store=None, snapshot_ts=None):
+        """
+        Save every successful parse_many result to data/adp_data/{year}/{position}_{POS}.csv,
+        and append it to `store` (an ADPStore) as one snapshot when given.
+        """
+        snapshot_ts = snapshot_ts or datetime.now(timezone.utc)
+        for (year, position), result in results.items():
+            if result["error"]:
+                continue
+            filename = f"data/adp_data/{year}/{position}.csv"
+            self.save_to_csv(result["headers"], result["data"], filename, split_by_position=True)
+            if store is not None:
+                stored = store.append(adp_frame(result["headers"], result["data"]), year, snapshot_ts)
+                logging.info(f"Stored {stored} {position} rows for {year} in {store.root}")
+
     def parse_all_positions(self, year):
         """Parse all positions (QB, RB, WR, TE) for a specific year and save each split by POS."""
-        positions = ["QB", "RB", "WR", "TE"]
-        for position in positions:
-            headers, data = self.parse_position(position, year)
-            if headers and data:
-                filename = f"data/adp_data/{year}/{position}.csv"
-                self.save_to_csv(headers, data, filename, split_by_position=True)
-            else:
-                logging.warning(f"No data found for {position} in {year}")
+        results = self.parse_many([year])
+        self.summarize(results)
+        self.save_many(results)
 
     def save_to_csv(self, headers, data, filename, split_by_position=False):
         """Save data to CSV. Optionally split into multiple files based on POS (WR, RB, etc.)."""
@@ -77,7 +435,7 @@ class DraftCalculator:
             logging.warning(f"No data to save for {filename}")
             return
 
-        df = pl.DataFrame({header: [row[i] if i < len(row) else None for row in data] for i, header in enumerate(headers)})
+        df = adp_frame(headers, data)
 
         if "POS" in df.columns:
             df = df.with_columns([
@@ -105,12 +463,20 @@ class DraftCalculator:
 
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Scrape FantasyPros ADP tables.")
+    arg_parser.add_argument("--bench", nargs="+", metavar="HTML", help="benchmark table parsing on saved pages and exit")
+    args = arg_parser.parse_args()
+    if args.bench:
+        benchmark_parse(args.bench)
+        raise SystemExit(0)
+
     # Main script entry point
     base_url = "https://www.fantasypros.com/nfl/adp/"
     parser = DraftCalculator(base_url)
 
     years = list(range(2020, 2026))  # 2020 through 2025
-    for year in years:
-        logging.info(f"--- Parsing ADP data for year: {year} ---")
-        parser.parse_all_positions(year)
-        print(f"ADP data for year {year} parsed successfully.\n")
+    logging.info(f"--- Parsing ADP data for years: {years[0]}-{years[-1]} ---")
+    results = parser.parse_many(years, POSITIONS)
+    failures = parser.summarize(results)
+    parser.save_many(results, store=ADPStore())
+    print(f"ADP data parsed: {len(results) - len(failures)} pages saved, {len(failures)} failed.\n")
@@ -1,13 +1,29 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import date, datetime
 import requests
 from bs4 import BeautifulSoup
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from itertools import product
 import polars as pl
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 START_YEAR = 2018
 END_YEAR = 2026
 historical_years = range(START_YEAR, END_YEAR)
 
+ROSTER_URL = "https://www.nfl.com/sitemap/html/rosters/{year}/{team}"
+# Roster pages requested at once; parsing runs separately in a process pool
+MAX_IN_FLIGHT = 8
+
+ROSTER_CACHE_PATH = "backend/static/data/cache/nfl_roster_pages.sqlite"
+# Hive-partitioned Parquet dataset: nfl_rosters/Year=2024/*.parquet
+ROSTER_DATASET = "backend/static/data/nfl_metadata/nfl_rosters"
+ROSTER_SCHEMA = {"Player": pl.Utf8, "Year": pl.Int32, "Team": pl.Utf8}
+
 nfl_teams = [
     "arizona-cardinals",
     "atlanta-falcons",
@@ -44,19 +60,119 @@ nfl_teams = [
 ]
 
 
-def get_historical_data(
-    session: requests.Session, year: int, team: str
-) -> pl.DataFrame | None:
+def current_season(today: date | None = None) -> int:
+    # The season rolls over in March, after the Super Bowl
+    today = today or date.today()
+    return today.year if today.month >= 3 else today.year - 1
+
+
+def season_end(year: int) -> float:
+    # Epoch seconds when `year`'s season is over: the March rollover of current_season
+    return datetime(year + 1, 3, 1).timestamp()
+
+
+class RosterCache:
     """
-    Return a DataFrame with columns: Player, Year, Team.
-    None signals a fetch or parse problem.
+    On-disk snapshot of roster pages: parsed (Player, Year, Team) rows plus the
+    ETag / Last-Modified validators of the response they came from.
+
+    Completed seasons never change, so snapshots taken after a season ended
+    are served without touching the network; everything else (current-season
+    pages, and pages cached while their season was still in progress) is
+    revalidated with a conditional GET.
     """
-    url = f"https://www.nfl.com/sitemap/html/rosters/{year}/{team}"
-    print(f"Getting data from {url}")
+
+    def __init__(self, path: str = ROSTER_CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.con = sqlite3.connect(path)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS roster_page (
+                team          TEXT NOT NULL,
+                year          INTEGER NOT NULL,
+                etag          TEXT,
+                last_modified TEXT,
+                rows          TEXT NOT NULL,
+                fetched_at    REAL NOT NULL,
+                PRIMARY KEY (team, year)
+            )
+        """)
+        self.con.commit()
+        self.stats = {"immutable": 0, "not_modified": 0, "fetched": 0}
+
+    def get(self, team: str, year: int) -> dict | None:
+        row = self.con.execute(
+            "SELECT etag, last_modified, rows, fetched_at FROM roster_page WHERE team = ? AND year = ?", (team, year)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "rows": [(player, int(yr), tm) for player, yr, tm in json.loads(row[2])],
+            "fetched_at": row[3],
+        }
+
+    def put(self, team: str, year: int, rows: list, etag: str | None, last_modified: str | None) -> None:
+        self.con.execute(
+            "INSERT OR REPLACE INTO roster_page VALUES (?, ?, ?, ?, ?, ?)",
+            (team, year, etag, last_modified, json.dumps(rows), time.time()),
+        )
+        self.con.commit()
+
+    def touch(self, team: str, year: int) -> None:
+        # A 304 confirms the stored snapshot is still current as of now
+        self.con.execute(
+            "UPDATE roster_page SET fetched_at = ? WHERE team = ? AND year = ?", (time.time(), team, year)
+        )
+        self.con.commit()
+
+    @staticmethod
+    def is_immutable(year: int, fetched_at: float) -> bool:
+        return year < current_season() and fetched_at >= season_end(year)
+
+    @staticmethod
+    def conditional_headers(entry: dict | None) -> dict:
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def report(self) -> str:
+        return (
+            f"Roster cache: {self.stats['immutable']} immutable, "
+            f"{self.stats['not_modified']} not modified, {self.stats['fetched']} fetched"
+        )
+
+    def close(self) -> None:
+        self.con.close()
+
+
+def fetch_roster_page(
+    session: requests.Session, year: int, team: str, headers: dict | None = None
+) -> requests.Response | None:
+    """Return the roster page response (200, or 304 for a conditional GET), or None if the request failed."""
+    url = ROSTER_URL.format(year=year, team=team)
     try:
-        response = session.get(url, timeout=15)
+        response = session.get(url, headers=headers, timeout=15)
+        if response.status_code == 304:
+            return response
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        return response
+    except Exception as exc:
+        tqdm.write(f"Failed {year} {team}: {exc}")
+        return None
+
+
+def parse_roster_page(html: str, year: int, team: str) -> list[tuple[str, int, str]] | None:
+    """
+    Return (Player, Year, Team) rows from a roster page.
+    None signals a parse problem or an empty roster table.
+    """
+    try:
+        soup = BeautifulSoup(html, "html.parser")
         table = soup.find("table", class_="d3-o-table")
         rows = table.find_all("tr")[1:] if table else []
 
@@ -72,36 +188,144 @@ def get_historical_data(
             player = (
                 link.get_text(strip=True) if link else cells[1].get_text(strip=True)
             )
-            data.append((player, str(year), team))
-
-        return pl.DataFrame(data, schema=["Player", "Year", "Team"])
+            data.append((player, year, team))
+        return data
 
     except Exception as exc:
         print(f"Failed {year} {team}: {exc}")
         return None
 
 
-def main() -> None:
-    frames: list[pl.DataFrame] = []
-    pairs = product(nfl_teams, historical_years)
+def get_historical_data(
+    session: requests.Session, year: int, team: str
+) -> pl.DataFrame | None:
+    """
+    Return a DataFrame with columns: Player, Year, Team.
+    None signals a fetch or parse problem.
+    """
+    print(f"Getting data from {ROSTER_URL.format(year=year, team=team)}")
+    response = fetch_roster_page(session, year, team)
+    data = parse_roster_page(response.text, year, team) if response is not None else None
+    if not data:
+        return None
+    return pl.DataFrame(data, schema=ROSTER_SCHEMA, orient="row")
+
+
+def scrape_rosters(
+    pairs: list[tuple[str, int]], max_in_flight: int = MAX_IN_FLIGHT, cache: RosterCache | None = None
+) -> dict[tuple[str, int], list[tuple[str, int, str]]]:
+    """
+    Fetch and parse every (team, year) roster page concurrently.
+
+    Up to `max_in_flight` pages are requested at once over one keep-alive
+    session; each downloaded page is handed to a process pool for parsing so
+    the fetch threads never wait on BeautifulSoup. Failed pages are left out.
 
-    with requests.Session() as session:
-        for team, year in tqdm(
-            pairs,
-            total=len(nfl_teams) * len(historical_years),
-            desc="Scraping NFL rosters",
-            unit="combo",
-        ):
-            df = get_historical_data(session, year, team)
-            if df is not None and df.height > 0:
-                frames.append(df)
+    With a `cache`, completed seasons already snapshotted are not requested
+    at all and the rest are conditional GETs; a 304 reuses the stored rows.
+    """
+    results = {}
+    snapshots = {}
+    to_fetch = []
+    for team, year in pairs:
+        entry = cache.get(team, year) if cache is not None else None
+        if entry is not None and RosterCache.is_immutable(year, entry["fetched_at"]):
+            results[(team, year)] = entry["rows"]
+            cache.stats["immutable"] += 1
+        else:
+            snapshots[(team, year)] = entry
+            to_fetch.append((team, year))
+
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+    with (
+        requests.Session() as session,
+        ThreadPoolExecutor(max_workers=max_in_flight) as fetch_pool,
+        ProcessPoolExecutor() as parse_pool,
+        tqdm(total=len(pairs), initial=len(pairs) - len(to_fetch), desc="Scraping NFL rosters", unit="combo") as bar,
+    ):
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        pending = {
+            fetch_pool.submit(
+                fetch_roster_page, session, year, team, RosterCache.conditional_headers(snapshots[(team, year)])
+            ): ("fetch", team, year, None)
+            for team, year in to_fetch
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, team, year, response = pending.pop(fut)
+                if stage == "fetch":
+                    response = fut.result()
+                    if response is not None and response.status_code == 304 and snapshots[(team, year)]:
+                        results[(team, year)] = snapshots[(team, year)]["rows"]
+                        cache.touch(team, year)
+                        cache.stats["not_modified"] += 1
+                    elif response is not None and response.status_code == 200:
+                        pending[parse_pool.submit(parse_roster_page, response.text, year, team)] = (
+                            "parse", team, year, response,
+                        )
+                        continue
+                else:
+                    data = fut.result()
+                    if data:
+                        results[(team, year)] = data
+                        if cache is not None:
+                            cache.put(
+                                team, year, data, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                            )
+                            cache.stats["fetched"] += 1
+                bar.update(1)
+    return results
+
+
+def roster_frame(rows: list[tuple[str, int, str]]) -> pl.DataFrame:
+    """
+    Typed roster table: categorical Player/Team, integer Year and a
+    precomputed `player_key` (trimmed, lower-cased name) for joins.
+    """
+    return (
+        pl.DataFrame(rows, schema=ROSTER_SCHEMA, orient="row")
+        .with_columns(
+            pl.col("Player").str.strip_chars().str.to_lowercase().alias("player_key"),
+        )
+        .with_columns(
+            pl.col("Player").cast(pl.Categorical),
+            pl.col("Team").cast(pl.Categorical),
+        )
+    )
+
+
+def write_roster_dataset(df: pl.DataFrame, path: str = ROSTER_DATASET) -> None:
+    df.sort("Year", "Team").write_parquet(path, partition_by="Year")
+
+
+def load_rosters(years: list[int] | None = None, path: str = ROSTER_DATASET) -> pl.LazyFrame:
+    """Scan the roster dataset; filtering on `years` prunes the other Year= partitions."""
+    lf = pl.scan_parquet(path, hive_partitioning=True, hive_schema={"Year": pl.Int32})
+    if years is not None:
+        lf = lf.filter(pl.col("Year").is_in(list(years)))
+    return lf
+
+
+def main(max_in_flight: int = MAX_IN_FLIGHT, use_cache: bool = True) -> None:
+    pairs = list(product(nfl_teams, historical_years))
+    cache = RosterCache() if use_cache else None
+    try:
+        results = scrape_rosters(pairs, max_in_flight, cache)
+    finally:
+        if cache is not None:
+            print(cache.report())
+            cache.close()
 
-    if not frames:
+    rows = [row for pair in pairs for row in results.get(pair, [])]
+    if not rows:
         print("No data collected")
         return
 
-    combined = pl.concat(frames)
-    combined.write_csv(
+    combined = roster_frame(rows)
+    write_roster_dataset(combined)
+    combined.select("Player", "Year", "Team").write_csv(
         f"backend/static/data/nfl_metadata/nfl_rosters_{START_YEAR}_{END_YEAR - 1}.csv"
     )
     print(f"Rows written: {combined.height}")